@@ -0,0 +1,108 @@
+"""
+Micro-benchmark: per-call latency of formatting and sending a full JS source every tick
+versus calling an entry point of the injected ChessBotBridge helper library.\n
+Run from the repository root:
+    python -m Benchmarks.js_bridge_benchmark [calls]
+"""
+
+import statistics
+import sys
+import time
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtWebEngineWidgets import QWebEngineView
+
+from Components.js_bridge_component import installBridge, runBridge
+
+## the per-tick source getOpponentMove used to build with str.format
+LEGACY_JS = """
+    function childImg(move){{
+        let sanString = '';
+        if(!move)
+            return null
+        for (let i of move?.childNodes){{
+            sanString+=i?.textContent || i?.getAttribute('data-figurine')
+        }}
+        return sanString
+    }}
+    function getOpponentMove() {{
+        let moves = document.querySelectorAll('{0}');
+        let move = moves[moves.length-1]
+        if(move?.querySelector('[class*=result]')){{
+            LastMove = moves[moves.length-1]
+            if (moves.length != 1){{
+                move = moves[moves.length-2]
+            }}
+            move = move.querySelectorAll('[class~=node]')
+            return [childImg(LastMove?.querySelector('[class*=white]')),childImg(LastMove?.querySelector('[class*=black]')),childImg(move[0]),childImg(move[1])]
+        }}
+        move = move.querySelectorAll('[class~=node]')
+        return [childImg(move[0]),childImg(move[1])]
+    }}
+    getOpponentMove();
+"""
+
+
+##synthetic move list shaped like the chess.com one
+def moveListHtml(rows=40):
+    body = "".join(
+        '<div class="move"><div class="white node">e4</div>'
+        '<div class="black node"><span data-figurine="N"></span>f6</div></div>'
+        for _ in range(rows)
+    )
+    return "<html><body>{0}</body></html>".format(body)
+
+
+def summary(name, samples):
+    samples = sorted(samples)
+    print(
+        "{0:<8} calls={1} mean={2:.3f}ms median={3:.3f}ms p95={4:.3f}ms".format(
+            name,
+            len(samples),
+            statistics.mean(samples) * 1000,
+            statistics.median(samples) * 1000,
+            samples[int(len(samples) * 0.95) - 1] * 1000,
+        )
+    )
+
+
+def main(calls):
+    app = QApplication(sys.argv)
+    view = QWebEngineView()
+    installBridge(view.page())
+    results = {"legacy": [], "bridge": []}
+
+    ## calls run back to back, each one waits for the previous result like the timers do
+    def runLegacy(count):
+        if count >= calls:
+            runBridgeCall(0)
+            return
+        start = time.perf_counter()
+
+        def done(result):
+            results["legacy"].append(time.perf_counter() - start)
+            runLegacy(count + 1)
+
+        view.page().runJavaScript(LEGACY_JS.format(".move"), done)
+
+    def runBridgeCall(count):
+        if count >= calls:
+            summary("legacy", results["legacy"])
+            summary("bridge", results["bridge"])
+            app.quit()
+            return
+        start = time.perf_counter()
+
+        def done(result):
+            results["bridge"].append(time.perf_counter() - start)
+            runBridgeCall(count + 1)
+
+        runBridge(view.page(), "lastMoves", callback=done)
+
+    view.loadFinished.connect(lambda ok: runLegacy(0))
+    view.setHtml(moveListHtml())
+    app.exec()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,76 @@
+"""
+Headless benchmark: time from speak() to the start of the utterance while the user
+travels the board with the arrow keys and the opponent moves, using the recording
+speech backend, so no audio device or speech driver is needed.\n
+Run from the repository root:
+    python -m Benchmarks.speech_latency_benchmark [moves]
+"""
+
+import statistics
+import sys
+import time
+
+from Components.speak_component import TTSThread
+from Components.speech_backend_component import RecordingBackend
+from Utils.enum_helper import Speech_category
+
+## arrow key auto repeat
+KEY_INTERVAL = 0.03
+
+
+def summary(name, samples):
+    samples = sorted(samples)
+    print(
+        "{0:<14} count={1} mean={2:.1f}ms median={3:.1f}ms worst={4:.1f}ms".format(
+            name,
+            len(samples),
+            statistics.mean(samples),
+            statistics.median(samples),
+            samples[-1],
+        )
+    )
+
+
+def main(moves):
+    backend = RecordingBackend()
+    speak_thread = TTSThread(backend)
+    announced = []
+
+    for move in range(moves):
+        ## the user scans a rank, then the opponent answers mid sentence
+        for file in "ABCDEFGH":
+            speak_thread.say(
+                file + "4 white knight", category=Speech_category.navigation
+            )
+            time.sleep(KEY_INTERVAL)
+        announced.append(len(backend.utterances))
+        speak_thread.say(
+            "BLACK knight captures WHITE pawn on E4 and check",
+            True,
+            Speech_category.opponent_move,
+        )
+        speak_thread.say(
+            "you remain 2 minutes, opponent remain 1 minute",
+            category=Speech_category.query,
+        )
+        time.sleep(3)
+
+    time.sleep(4)
+    utterances = list(backend.utterances.values())
+    waits = {"navigation": [], "opponent move": []}
+    for index, utterance in enumerate(utterances):
+        if utterance["started"] == None:
+            continue
+        wait = (utterance["started"] - utterance["enqueued"]) * 1000
+        if index in announced:
+            waits["opponent move"].append(wait)
+        elif utterance["sentence"].endswith("white knight"):
+            waits["navigation"].append(wait)
+    for name, samples in waits.items():
+        if len(samples) > 0:
+            summary(name, samples)
+    print("speech", speak_thread.report())
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
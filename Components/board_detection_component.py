@@ -1,15 +1,91 @@
 import cv2
 import math
+import numpy as np
+
+
+##split hough segments into vertical and horizontal lines as (coordinate, start, end) rows
+def split_lines(lines, padding=10):
+    lines = lines.reshape(-1, 4).astype(np.int64)
+    x1, y1, x2, y2 = lines.T
+
+    vertical = np.abs(x2 - x1) < 1
+    horizontal = np.abs(y2 - y1) < 1
+
+    # extend each segment a little so the board corners still intersect
+    vertical_lines = np.stack(
+        (
+            x1[vertical],
+            np.minimum(y1, y2)[vertical] - padding,
+            np.maximum(y1, y2)[vertical] + padding,
+        ),
+        axis=1,
+    )
+    horizontal_lines = np.stack(
+        (
+            y1[horizontal],
+            np.minimum(x1, x2)[horizontal] - padding,
+            np.maximum(x1, x2)[horizontal] + padding,
+        ),
+        axis=1,
+    )
+    return vertical_lines, horizontal_lines
+
+
+##bin lines by coordinate and mark which vertical / horizontal bins intersect
+def intersection_grid(vertical_lines, horizontal_lines):
+    xs, v_bin = np.unique(vertical_lines[:, 0], return_inverse=True)
+    ys, h_bin = np.unique(horizontal_lines[:, 0], return_inverse=True)
+
+    # every vertical segment against every horizontal segment in one broadcast
+    v = vertical_lines[:, None, :]
+    h = horizontal_lines[None, :, :]
+    hit = (h[..., 1] <= v[..., 0]) & (v[..., 0] <= h[..., 2])
+    hit &= (v[..., 1] <= h[..., 0]) & (h[..., 0] <= v[..., 2])
+
+    # grid[row, col] = horizontal line ys[row] crosses vertical line xs[col]
+    grid = np.zeros((len(ys), len(xs)), dtype=bool)
+    v_index, h_index = np.nonzero(hit)
+    grid[h_bin[h_index], v_bin[v_index]] = True
+    return xs, ys, grid
+
+
+##find the first line crossed exactly 9 times at evenly spaced points
+def find_lattice_line(coordinates, crossings, tolerance=0.1):
+    counts = crossings.sum(axis=1)
+    candidates = np.flatnonzero(counts == 9)
+    if len(candidates) == 0:
+        return None
+
+    selected = crossings[candidates]
+    points = np.broadcast_to(coordinates, selected.shape)[selected].reshape(-1, 9)
+    interval = (points[:, -1] - points[:, 0]) / 8
+    deviation = np.abs(np.diff(points, axis=1) - interval[:, None])
+    trusted = np.flatnonzero(
+        (interval > 0) & np.all(deviation <= interval[:, None] * tolerance, axis=1)
+    )
+    if len(trusted) == 0:
+        return None
+    return points[trusted[0]]
+
+
+##accept an image file path (debugging) or an in-memory BGR / BGRA array
+def loadImage(source):
+    if isinstance(source, np.ndarray):
+        return source
+    return cv2.imread(source)
 
 
 ##detect the chessboard on web view
-def detectChessboard(webViewPath, viewWidth, viewHeight):
+def detectChessboard(webView, viewWidth, viewHeight):
     # Step 1: Load the Image
-    img = cv2.imread(webViewPath)
+    img = loadImage(webView)
     height, width, channels = img.shape
     print(height, width)
     # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    if channels == 4:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+    else:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
     # Gaussian blur
     blur = cv2.GaussianBlur(gray, (5, 5), 0)
@@ -22,102 +98,27 @@ def detectChessboard(webViewPath, viewWidth, viewHeight):
     lines = cv2.HoughLinesP(
         edges, 1, math.pi / 180, 30, minLineLength=height / 4, maxLineGap=10
     )
+    if lines is None:
+        raise ValueError("No line detected")
+
+    vertical_lines, horizontal_lines = split_lines(lines)
+    if len(vertical_lines) == 0 or len(horizontal_lines) == 0:
+        raise ValueError("No board line detected")
 
-    # Store vertical and horizontal lines
-    vertical_lines = []
-    horizontal_lines = []
-
-    for line in lines:
-        x1, y1, x2, y2 = line[0]
-        if abs(x2 - x1) < 1:  # select vertical lines
-            y1 += 10
-            y2 -= 10
-            # cv2.line(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            vertical_lines.append((x1, y1, x2, y2))
-
-        if abs(y2 - y1) < 1:  # select horizontal lines
-            x1 -= 10
-            x2 += 10
-            # cv2.line(img, (x1, y1), (x2, y2), (0, 0, 255), 2)
-            horizontal_lines.append((x1, y1, x2, y2))
-
-    intersect_points = []
-    for v_line in vertical_lines:
-        for h_line in horizontal_lines:
-            x1_v, y1_v, x2_v, y2_v = v_line
-            x1_h, y1_h, x2_h, y2_h = h_line
-            if (x1_h <= x1_v <= x2_h) and (y2_v <= y1_h <= y1_v):
-                intersect_points.append((x1_v, y1_h))
-                # cv2.circle(img, (x1_v, y1_h), 10, (255, 0, 0), -1)
-
-    upper_left = None
-    lower_right = None
-
-    sorted_by_x = sorted(intersect_points, key=lambda x: (x[0], x[1]))
-    print(sorted_by_x)
-
-    trust_horizontal = []
-    for i in sorted_by_x:
-        tuples_with_x = [t for t in sorted_by_x if t[0] == i[0]]  ## horizontal line
-        if len(tuples_with_x) == 9:
-            ##test whether the line can be trust
-            len_interval = (tuples_with_x[-1][0] - tuples_with_x[0][0]) / 8
-
-            intervals = []
-            for j in range(len(tuples_with_x) - 1):
-                intervals.append(tuples_with_x[j + 1][0] - tuples_with_x[j][0])
-
-            all_pass = True
-            for interval in intervals:
-                if not math.isclose(interval, len_interval, abs_tol=len_interval * 0.1):
-                    all_pass = False
-                    break
-
-            if all_pass:
-                trust_horizontal = tuples_with_x
-                break
-
-    sorted_by_y = sorted(intersect_points, key=lambda x: (x[1], x[0]))
-    print(sorted_by_y)
-
-    trust_vertical = []
-    for i in sorted_by_y:
-        tuples_with_y = [t for t in sorted_by_y if t[1] == i[1]]  ## vertical line
-        if len(tuples_with_y) == 9:
-            ##test whether the line can be trust
-            ##condition = pattern interval
-            len_interval = (tuples_with_y[-1][1] - tuples_with_y[0][1]) / 8
-
-            intervals = []
-            for j in range(len(tuples_with_y) - 1):
-                intervals.append(tuples_with_y[j + 1][1] - tuples_with_y[j][1])
-
-            all_pass = True
-            for interval in intervals:
-                if not math.isclose(interval, len_interval, abs_tol=len_interval * 0.1):
-                    all_pass = False
-                    break
-
-            if all_pass:
-                trust_vertical = tuples_with_y
-                break
-    upper_left = (trust_vertical[0][0], trust_horizontal[0][1])
-    lower_right = (trust_vertical[-1][0], trust_horizontal[-1][1])
+    xs, ys, grid = intersection_grid(vertical_lines, horizontal_lines)
+
+    # a board column is crossed by the 9 horizontal board lines and vice versa
+    trust_horizontal = find_lattice_line(ys, grid.T)
+    trust_vertical = find_lattice_line(xs, grid)
+    if trust_horizontal is None or trust_vertical is None:
+        raise ValueError("No 9x9 lattice detected")
+    print(trust_vertical, trust_horizontal)
+
+    upper_left = (int(trust_vertical[0]), int(trust_horizontal[0]))
+    lower_right = (int(trust_vertical[-1]), int(trust_horizontal[-1]))
     # cv2.circle(img, upper_left, 10, (0, 255, 0), -1)
     # cv2.circle(img, lower_right, 10, (0, 0, 255), -1)
 
-    # upper left and lower right point method
-    # for i in sorted_by_x:
-    #     tuples_with_x = [t for t in sorted_by_x if t[0] == i[0]]
-    #     if 7 <= len(tuples_with_x) <= 11:
-    #         tuples_with_y = [t for t in sorted_by_x if t[1] == tuples_with_x[-1][1]]
-    #         if 7 <= len(tuples_with_y) <= 11:
-    #             upper_left = tuples_with_x[0]
-    #             lower_right = tuples_with_y[-1]
-    #             cv2.circle(img, upper_left, 10, (0, 255, 0), -1)
-    #             cv2.circle(img, lower_right, 10, (0, 0, 255), -1)
-    #             break
-
     widthFactor = viewWidth / img.shape[1]
     heightFactor = viewHeight / img.shape[0]
 
@@ -148,9 +149,9 @@ def classify_pixel_color(rgb):
 
 
 ##detect the user's assigned color
-def userColor(image_path):
+def userColor(image):
     # Load the image
-    image = cv2.imread(image_path)
+    image = loadImage(image)
 
     # Get the dimensions of the image
     height, width, _ = image.shape
@@ -160,6 +161,6 @@ def userColor(image_path):
     center_y = height // 2
 
     # Get the color of the center pixel
-    center_pixel_color = image[center_y, center_x]
+    center_pixel_color = image[center_y, center_x][:3]
 
     return classify_pixel_color(center_pixel_color)
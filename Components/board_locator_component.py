@@ -0,0 +1,73 @@
+from Components.board_detection_component import detectChessboard
+from Components.js_bridge_component import runBridge
+from Utils.enum_helper import Board_locate_source
+from Utils.image_helper import qimageToArray
+
+
+## locate the chessboard on web view, DOM measurement first and computer vision as fallback
+class BoardLocator:
+    def __init__(self, webView):
+        self.webView = webView
+        self.stats = {
+            Board_locate_source.dom.value: 0,
+            Board_locate_source.cv.value: 0,
+            "FAILED": 0,
+        }
+
+    def locate(self, callback):
+        """
+        This function find the board geometry in web view coordinates\n
+        Parameters :
+            - callback(geometry, source)
+
+        Returns (through callback):
+            success:
+                -turple(x, y, w, h), Board_locate_source
+            fails:
+                -None, None
+        """
+
+        def domCallback(rect):
+            geometry = self.fromDomRect(rect)
+            if geometry is not None:
+                self.report(Board_locate_source.dom)
+                callback(geometry, Board_locate_source.dom)
+                return
+
+            try:
+                screenshot, frame = qimageToArray(self.webView.grab())
+                geometry = detectChessboard(
+                    frame, self.webView.width(), self.webView.height()
+                )
+            except Exception as e:
+                print("board detection error", e)
+                self.report(None)
+                callback(None, None)
+                return
+            self.report(Board_locate_source.cv)
+            callback(geometry, Board_locate_source.cv)
+
+        # board rect in CSS pixels relative to the viewport
+        runBridge(self.webView.page(), "boardRect", callback=domCallback)
+
+    ##convert the CSS pixel rect to widget coordinates, None when it is not a board
+    def fromDomRect(self, rect):
+        if not rect or len(rect) != 5:
+            return None
+        left, top, width, height, cssRatio = rect
+        if width <= 0 or height <= 0 or abs(width - height) > width * 0.05:
+            return None
+
+        # page zoom = CSS device pixel ratio / screen device pixel ratio
+        scale = cssRatio / self.webView.devicePixelRatioF()
+        x = left * scale
+        y = top * scale
+        if x < 0 or y < 0:
+            return None
+        return (int(x), int(y), int(width * scale), int(height * scale))
+
+    ##count which path found the board to track the DOM hit rate
+    def report(self, source):
+        key = "FAILED" if source is None else source.value
+        self.stats[key] += 1
+        print("board located by", key, self.stats)
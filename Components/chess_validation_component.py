@@ -1,5 +1,9 @@
 import chess
+import chess.polyglot
 import chess.variant
+from collections import OrderedDict
+
+from Utils.enum_helper import Verbosity
 
 name_conversion = {
     "queen": "q",
@@ -11,139 +15,456 @@ name_conversion = {
 }
 
 
+## square name -> square index, e.g. "e4" -> 28
+SQUARE_INDEX = {name: square for square, name in enumerate(chess.SQUARE_NAMES)}
+
+## announced from the most to the least valuable piece
+SPEECH_PIECE_ORDER = [
+    chess.KING,
+    chess.QUEEN,
+    chess.ROOK,
+    chess.BISHOP,
+    chess.KNIGHT,
+    chess.PAWN,
+]
+
+COLOR_NAMES = {chess.WHITE: "WHITE", chess.BLACK: "BLACK"}
+
+
+##square names of a square set ordered file by file, e.g. a2 b2 c2
+def speechOrder(squares):
+    return [
+        chess.SQUARE_NAMES[square]
+        for square in sorted(
+            squares, key=lambda square: (chess.square_file(square), square)
+        )
+    ]
+
+
+## move sentences of each verbosity, compiled once, e.g. full "WHITE knight captures BLACK pawn on E5 and check ",
+## brief "knight takes e5 check", terse "Nxe5 check"
+MOVE_TEMPLATES = {
+    Verbosity.full: {
+        "kingside": "{color} kingside castling".format,
+        "queenside": "{color} queenside castling".format,
+        "en_passant": "{color} {piece} captures on {SQUARE} en passant".format,
+        "capture": "{color} {piece} captures {opponent} {captured} on {SQUARE}".format,
+        "move": "{color} {piece} moves to {square}".format,
+        "promotion": "{sentence} and promoted to {promotion}".format,
+        "check": "{sentence} and check ".format,
+        "mate": "{sentence} and checkmate ".format,
+    },
+    Verbosity.brief: {
+        "kingside": "castles short".format,
+        "queenside": "castles long".format,
+        "en_passant": "{piece} takes {square}".format,
+        "capture": "{piece} takes {square}".format,
+        "move": "{piece} {square}".format,
+        "promotion": "{sentence} promotes {promotion}".format,
+        "check": "{sentence} check".format,
+        "mate": "{sentence} mate".format,
+    },
+    Verbosity.terse: {
+        "kingside": "castles short".format,
+        "queenside": "castles long".format,
+        "en_passant": "{san}".format,
+        "capture": "{san}".format,
+        "move": "{san}".format,
+        "promotion": "{sentence}".format,
+        "check": "{sentence} check".format,
+        "mate": "{sentence} mate".format,
+    },
+}
+
+
+##sentence of a move from the position before it, in the wording of the verbosity
+def describeMove(board, move, verbosity=Verbosity.full):
+    """
+    The board is only read, the move is not pushed\n
+    Parameters :
+        - board: position before the move
+        - move: legal chess.Move of that position
+        - verbosity: Verbosity of MOVE_TEMPLATES
+    """
+    templates = MOVE_TEMPLATES[verbosity]
+    destination = chess.square_name(move.to_square)
+    facts = {
+        "color": COLOR_NAMES[board.turn],
+        "piece": chess.piece_name(board.piece_type_at(move.from_square)),
+        "square": destination,
+        "SQUARE": destination.upper(),
+    }
+    if verbosity == Verbosity.terse:
+        ## the check suffix is spoken, a promotion "e8=Q" as "e8 Q"
+        facts["san"] = board.san(move).rstrip("+#").replace("=", " ")
+
+    if board.is_castling(move):
+        kind = "kingside" if board.is_kingside_castling(move) else "queenside"
+    elif board.is_en_passant(move):
+        kind = "en_passant"
+    elif board.is_capture(move):
+        kind = "capture"
+        facts["opponent"] = COLOR_NAMES[not board.turn]
+        facts["captured"] = chess.piece_name(board.piece_type_at(move.to_square))
+    else:
+        kind = "move"
+    sentence = templates[kind](**facts)
+
+    if not move.promotion == None:
+        sentence = templates["promotion"](
+            sentence=sentence, promotion=chess.piece_name(move.promotion)
+        )
+    if board.gives_check(move):
+        ## the caller's board stays untouched, mate is tested on a copy without the move stack
+        after = board.copy(stack=False)
+        after.push(move)
+        mate = after.is_checkmate()
+        sentence = templates["mate" if mate else "check"](sentence=sentence)
+    return sentence
+
+
+## bounded LRU cache of facts derived from a position, keyed by its transposition hash
+class PositionCache:
+    def __init__(self, size=512):
+        self.size = size
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key, compute):
+        facts = self.entries.get(key)
+        if facts == None:
+            self.stats["misses"] += 1
+            facts = compute()
+            self.entries[key] = facts
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        else:
+            self.stats["hits"] += 1
+            self.entries.move_to_end(key)
+        return facts
+
+
+## shared by every game, the same positions come back in every opening
+POSITION_CACHE = PositionCache()
+
+
+## normalized spelling of a move, e.g. "Nxe5+" -> "nxe5", "O-O" -> "oo"
+def normalizeMove(moveString):
+    return "".join(filter(str.isalnum, moveString)).lower()
+
+
+## chess.Board that drop its legal move index whenever the position changes
+class MirrorBoard(chess.Board):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.move_index = None
+
+    def push(self, move):
+        self.move_index = None
+        super().push(move)
+
+    def pop(self):
+        self.move_index = None
+        return super().pop()
+
+    def set_fen(self, fen):
+        self.move_index = None
+        super().set_fen(fen)
+
+    def reset(self):
+        self.move_index = None
+        super().reset()
+
+
 ## a mirrored chessboard that sync with actual web view chessboard
 class ChessBoard:
     def __init__(self):
-        self.board_object = chess.Board()
+        self.board_object = MirrorBoard()
         print(self.board_object)
         print()
 
-    def moveByUCI(self, uciString):
+    def moveWithValidate(self, moveString):
         """
-        This function make move by using UCI string [target, destination]\n
+        This function make move by looking up the legal move index of the position\n
         Parameters :
-            - uciString
+            - moveString: UCI, SAN in any case, oo / 00 castling or promotion shorthand like e8q
 
         Returns:
             success:
-                -turple(true, Board object)
+                -turple(UCI string, SAN string) in upper case
             fails:
-                -turple(false, Error type)
+                -"Promotion" when the promotion piece is missing
+                -"Ambiguous move", "Illegal move" or "Invalid move"
         """
-        try:
-            move = chess.Move.from_uci(uciString)
-            sanString = self.board_object.san(move)
-            self.board_object.push_uci(uciString)
-            print("UCI move: ", uciString, sanString)
-            return (uciString.upper(), sanString.upper())
-        except Exception as e:
-            return e
+        ## make move first -> user confirm = no change -> user cancel = back
+        moveString = normalizeMove(moveString).replace("null", "")
+
+        moves = self.legal_move_index().get(moveString)
+        print("move lookup: ", moveString, " ", moves)
+        if moves == None:
+            if (
+                moveString in ["oo", "ooo", "00", "000"]
+                or chess.SAN_REGEX.match(moveString)
+                or chess.SAN_REGEX.match(moveString.capitalize())
+            ):
+                return "Illegal move"
+            try:
+                chess.Move.from_uci(moveString)
+                return "Illegal move"
+            except ValueError:
+                return "Invalid move"
+        if len(moves) > 1:
+            if len(set((move.from_square, move.to_square) for move in moves)) == 1:
+                return "Promotion"
+            return "Ambiguous move"
+
+        move = moves[0]
+        sanString = self.board_object.san(move)
+        self.board_object.push(move)
+        return (move.uci().upper(), sanString.upper())
 
-    def moveBySan(self, sanString):
+    ##every normalized spelling of every legal move, built once per position
+    def legal_move_index(self):
         """
-        This function make move by using SAN string\n
-        Parameters :
-            - sanString
+        Spellings are ranked, a spelling only keeps the moves of its best rank\n
+            - 0: UCI, pawn SAN, castling and the UCI / SAN without promotion piece
+            - 1: piece SAN, so "bxc3" is the pawn capture when a bishop can take too
+            - 2: shorthands without "x" or without the disambiguation, e.g. "nd2"
 
         Returns:
-            success:
-                -turple(true, Board object)
-            fails:
-                -turple(false, Error type)
+            -dict of spelling -> list of chess.Move, more than one move is ambiguous
         """
-        try:
-            if sanString == "oo" or sanString == "00":
-                sanString = "O-O"
-            elif sanString == "ooo" or sanString == "000":
-                sanString = "O-O-O"
+        board = self.board_object
+        if not board.move_index == None:
+            return board.move_index
 
-            uciString = self.board_object.parse_san(sanString).uci()
+        ranked = dict()
 
-            move = chess.Move.from_uci(uciString)
-            standard_san_string = self.board_object.san(move)
+        def add(spelling, rank, move):
+            best = ranked.get(spelling)
+            if best == None or rank < best[0]:
+                ranked[spelling] = (rank, [move])
+            elif rank == best[0] and not move in best[1]:
+                best[1].append(move)
 
-            self.board_object.push_san(standard_san_string)
-            print("SAN move", uciString, standard_san_string)
-            return (uciString.upper(), standard_san_string.upper())
-        except Exception as e:
-            return e
+        for move in board.legal_moves:
+            uciString = move.uci()
+            sanString = board.san(move).rstrip("+#")
+            add(uciString, 0, move)
 
-    def moveWithValidate(self, moveString):
-        ## make move first -> user confirm = no change -> user cancel = back
-        moveString = "".join(filter(str.isalnum, moveString))
-        moveString = moveString.replace(" ", "").replace("null", "").lower()
-
-        ##check coordinate notation
-        uciTrial = self.moveByUCI(moveString)
-        print("uci Trial trial: ", moveString, " ", uciTrial)
-        if not isinstance(uciTrial, Exception):
-            return uciTrial
-        elif isinstance(uciTrial, chess.IllegalMoveError):
-            print(self.check_grid(moveString[:2]).__str__().lower())
-            if (
-                moveString.endswith("8") or moveString.endswith("1")
-            ) and self.check_grid(moveString[:2]).__str__().lower() == "p":
-                return "Promotion"
-            return "Illegal move"
+            if board.is_castling(move):
+                spelling = normalizeMove(sanString)
+                add(spelling, 0, move)
+                add(spelling.replace("o", "0"), 0, move)
+                continue
 
-        ##check SAN
-        sanTrial = self.moveBySan(moveString)
-        print("San Trial trial: ", moveString, " ", sanTrial)
-        if not isinstance(sanTrial, Exception):
-            return sanTrial
+            pieceRank = 1 if sanString[0].isupper() else 0
+            add(normalizeMove(sanString), pieceRank, move)
+            if sanString.count("x"):
+                add(normalizeMove(sanString.replace("x", "")), 2, move)
+            if pieceRank == 1:
+                destination = chess.square_name(move.to_square)
+                add(normalizeMove(sanString[0] + destination), 2, move)
+                add(normalizeMove(sanString[0] + "x" + destination), 2, move)
 
-        ##check SAN with capitalized
-        capSanTrial = self.moveBySan(moveString.capitalize())
-        print("cap San Trial trial: ", moveString, " ", capSanTrial)
-        if not isinstance(capSanTrial, Exception):
-            return capSanTrial
-        elif isinstance(capSanTrial, chess.IllegalMoveError):
-            return "Illegal move"
+            ## promotion piece missing, every promotion of this pawn shares the spelling
+            if not move.promotion == None:
+                add(uciString[:4], 0, move)
+                add(normalizeMove(sanString[: sanString.index("=")]), 0, move)
 
-        return "Invalid move"
+        board.move_index = {spelling: best[1] for spelling, best in ranked.items()}
+        return board.move_index
 
     ##check piece type by square name
     def check_grid(self, grid):
-        grid = grid.lower()
-        try:
-            piece = self.board_object.piece_at(chess.SQUARE_NAMES.index(grid))
-        except Exception as e:
+        square = SQUARE_INDEX.get(grid.lower())
+        if square == None:
             return "Invalid square name"
-        return piece
+        return self.board_object.piece_at(square)
 
     ##check the locations by piece type
     def check_piece(self, piece):
         target_piece = piece.lower()
         if len(piece) > 1:
             target_piece = name_conversion.get(piece.lower())
-        white_list = []
-        black_list = []
-        for square in chess.SQUARE_NAMES:
-            result_piece = self.check_grid(square)
-            if (
-                not result_piece == None
-                and result_piece.symbol().lower() == target_piece
-            ):
-                if result_piece.symbol().islower():
-                    black_list.append(square)
+        if not target_piece in chess.PIECE_SYMBOLS[1:]:
+            return {"WHITE": [], "BLACK": []}
+        piece_type = chess.PIECE_SYMBOLS.index(target_piece)
+        return {
+            COLOR_NAMES[color]: speechOrder(self.board_object.pieces(piece_type, color))
+            for color in chess.COLORS
+        }
+
+    ##every piece of one color, grouped by piece type from king to pawn
+    def check_color(self, color):
+        """
+        Parameters :
+            - color: "WHITE" or "BLACK"
+
+        Returns:
+            -list of turple(piece type name, square names) without the missing piece types
+        """
+        color = color.upper() == "WHITE"
+        pieces = []
+        for piece_type in SPEECH_PIECE_ORDER:
+            squares = self.board_object.pieces(piece_type, color)
+            if squares:
+                pieces.append((chess.piece_name(piece_type), speechOrder(squares)))
+        return pieces
+
+    ##pieces of both colors attacking a square, the least valuable attacker first
+    def check_attackers(self, grid):
+        """
+        Parameters :
+            - grid: square name
+
+        Returns:
+            success:
+                -dict of color -> list of turple(piece type name, square name)
+            fails:
+                -"Invalid square name"
+        """
+        square = SQUARE_INDEX.get(grid.lower())
+        if square == None:
+            return "Invalid square name"
+        attackers = dict()
+        for color in chess.COLORS:
+            found = []
+            squareSet = self.board_object.attackers(color, square)
+            for piece_type in reversed(SPEECH_PIECE_ORDER):
+                for name in speechOrder(
+                    squareSet & self.board_object.pieces(piece_type, color)
+                ):
+                    found.append((chess.piece_name(piece_type), name))
+            attackers[COLOR_NAMES[color]] = found
+        return attackers
+
+    ##sentence of the last mirrored move, worked out on a copy of the position before it
+    def describe_last_move(self, verbosity=Verbosity.full):
+        before = self.board_object.copy(stack=1)
+        move = before.pop()
+        return describeMove(before, move, verbosity)
+
+    ##compare the FEN piece placement read from web view with the mirrored board
+    def is_synced(self, board_fen):
+        return self.board_object.board_fen() == board_fen.split(" ")[0]
+
+    ##compare the (ply count, last SAN) fingerprint of web view with the mirrored board
+    def matches_fingerprint(self, ply, lastSan):
+        if not ply == len(self.board_object.move_stack):
+            return False
+        if ply == 0:
+            return True
+        return self.last_san().rstrip("+#") == str(lastSan).rstrip("+#")
+
+    ##SAN of the last move on the mirrored board as web view writes it, None before the first move
+    def last_san(self):
+        if len(self.board_object.move_stack) == 0:
+            return None
+        last_board = self.board_object.copy(stack=1)
+        last_move = last_board.pop()
+        return last_board.san(last_move)
+
+    ##rebuild the mirrored board in bulk from the full SAN move list of web view
+    def rebuild(self, sanList):
+        """
+        The mirror is reset to the longest common prefix, missed moves are returned to be replayed\n
+        Parameters :
+            - sanList
+
+        Returns:
+            success:
+                -turple(list of missed UCI strings, number of dropped mirror plies)
+                -None when web view only lags behind the mirror
+            fails:
+                -Exception
+        """
+        try:
+            board = self.board_object.root()
+            for sanString in sanList:
+                board.push_san(sanString)
+        except Exception as e:
+            return e
+
+        common = 0
+        for mine, theirs in zip(self.board_object.move_stack, board.move_stack):
+            if not mine == theirs:
+                break
+            common += 1
+
+        ## the user's move may not be on web view yet, leave it to move verification
+        if common == len(board.move_stack):
+            return None
+
+        dropped = len(self.board_object.move_stack) - common
+        missed = [move.uci() for move in board.move_stack[common:]]
+        while len(self.board_object.move_stack) > common:
+            self.board_object.pop()
+        return (missed, dropped)
+
+    ##facts that only depend on the position, cached by its zobrist hash
+    def position_facts(self):
+        """
+        Returns:
+            -dict of "win" (detect_win sentence), "check", "legal_moves" count and "en_passant"
+        """
+        board = self.board_object
+
+        def compute():
+            legal_moves = board.legal_moves.count()
+            if legal_moves == 0 and board.is_check():
+                if board.turn:
+                    win = "Black wins by checkmate!"
                 else:
-                    white_list.append(square)
+                    win = "White wins by checkmate!"
+            elif legal_moves == 0:
+                win = "Stalemate!"
+            elif board.is_insufficient_material():
+                win = "Insufficient material!"
+            else:
+                win = "No win detected."
+            return {
+                "win": win,
+                "check": board.is_check(),
+                "legal_moves": legal_moves,
+                "en_passant": board.has_legal_en_passant(),
+            }
+
+        return POSITION_CACHE.get(chess.polyglot.zobrist_hash(board), compute)
+
+    ##facts that also depend on the moves since the last capture or pawn move
+    def history_facts(self):
+        """
+        Returns:
+            -dict of "repetitions" of the position, "threefold" and "fifty_moves" draw claims
+        """
+        board = self.board_object
+        window = board.halfmove_clock
+        key = (
+            chess.polyglot.zobrist_hash(board),
+            window,
+            tuple(board.move_stack[max(0, len(board.move_stack) - window) :]),
+        )
+
+        def compute():
+            repetitions = 1
+            while repetitions < 3 and board.is_repetition(repetitions + 1):
+                repetitions += 1
+            return {
+                "repetitions": repetitions,
+                "threefold": repetitions >= 3,
+                "fifty_moves": board.is_fifty_moves(),
+            }
 
-        return {"WHITE": white_list, "BLACK": black_list}
+        return POSITION_CACHE.get(key, compute)
+
+    ##hit / miss counters of the shared position cache
+    def cache_stats(self):
+        return POSITION_CACHE.stats
 
     ##detect whether game end
     def detect_win(self):
-        if self.board_object.is_checkmate():
-            if self.board_object.turn:
-                return "Black wins by checkmate!"
-            else:
-                return "White wins by checkmate!"
-        elif self.board_object.is_stalemate():
-            return "Stalemate!"
-        elif self.board_object.is_insufficient_material():
-            return "Insufficient material!"
-        else:
-            return "No win detected."
+        return self.position_facts()["win"]
 
 
 chessboard_in = ChessBoard()
@@ -0,0 +1,49 @@
+import os
+from PyQt6.QtCore import QObject, QBuffer, QByteArray, QIODevice
+from PyQt6.QtMultimedia import QAudioFormat, QAudioSink
+
+from Components.phrase_cache_component import loadClip
+from Utils.enum_helper import Earcon
+
+
+## short sound cues decoded once, each on its own output stream mixed with speech
+class EarconPlayer(QObject):
+    ## milliseconds of audio the sink buffers ahead, small so a cue starts at once
+    BUFFER_MS = 20
+
+    def __init__(self, directory):
+        """
+        This function decode every Earcon and open its output stream, call from the GUI thread\n
+        Parameters :
+            - directory: folder of the cue WAV files
+        """
+        super().__init__()
+        self.cues = dict()
+        self.stats = {"played": 0}
+        for earcon in Earcon:
+            clip = loadClip(os.path.join(directory, earcon.value))
+            if clip == None:
+                print("earcon not loaded", earcon.value)
+                continue
+            audioFormat = QAudioFormat()
+            audioFormat.setSampleRate(clip.sample_rate)
+            audioFormat.setChannelCount(clip.channels)
+            audioFormat.setSampleFormat(QAudioFormat.SampleFormat.Int16)
+
+            buffer = QBuffer()
+            buffer.setData(QByteArray(clip.frames))
+            buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+            sink = QAudioSink(audioFormat)
+            sink.setBufferSize(audioFormat.bytesForDuration(self.BUFFER_MS * 1000))
+            self.cues[earcon] = (sink, buffer)
+
+    ##restart the cue from the beginning, whatever the speech queue holds
+    def play(self, earcon):
+        cue = self.cues.get(earcon)
+        if cue == None:
+            return
+        sink, buffer = cue
+        sink.stop()
+        buffer.seek(0)
+        sink.start(buffer)
+        self.stats["played"] += 1
@@ -0,0 +1,86 @@
+import time
+
+from Utils.enum_helper import Time_control
+
+
+## settings that trade confirmation and verbosity for latency at one time control
+class GameProfile:
+    def __init__(
+        self,
+        timeControl,
+        confirmMove,
+        terseMoves,
+        fastInterval,
+        slowInterval,
+        latencyBudget,
+        lowTime,
+    ):
+        """
+        Parameters :
+            - timeControl: Time_control clicked on chess.com
+            - confirmMove: show the confirm dialog before a move is played
+            - terseMoves: announce moves as "knight takes e5 check"
+            - fastInterval, slowInterval: poll scheduler bounds in milliseconds
+            - latencyBudget: milliseconds allowed per stage before it is logged
+            - lowTime: seconds left on the user's clock that trigger the low time cue
+        """
+        self.time_control = timeControl
+        self.confirm_move = confirmMove
+        self.terse_moves = terseMoves
+        self.fast_interval = fastInterval
+        self.slow_interval = slowInterval
+        self.latency_budget = latencyBudget
+        self.low_time = lowTime
+
+    def is_fast(self):
+        return not self.time_control == Time_control.classical
+
+
+PROFILES = {
+    Time_control.classical: GameProfile(
+        Time_control.classical, True, False, 200, 2000, 3000, 60
+    ),
+    Time_control.blitz: GameProfile(Time_control.blitz, False, True, 100, 500, 800, 20),
+    Time_control.bullet: GameProfile(
+        Time_control.bullet, False, True, 50, 250, 400, 10
+    ),
+}
+
+
+##seconds shown by a chess.com clock, e.g. "1:05", "0:09.8" or "1:02:03", None when unreadable
+def clockSeconds(text):
+    try:
+        seconds = 0
+        for part in text.strip().split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    except (AttributeError, ValueError):
+        return None
+
+
+## end to end latency of each stage, e.g. opponent move seen -> announced, logged when over budget
+class LatencyBudget:
+    def __init__(self, budget):
+        self.budget = budget
+        self.started = dict()
+        self.stats = {"measured": 0, "exceeded": 0, "worst": 0}
+
+    def start(self, stage):
+        self.started[stage] = time.monotonic()
+
+    ##elapsed milliseconds of the stage, None when it was not started
+    def stop(self, stage):
+        started = self.started.pop(stage, None)
+        if started == None:
+            return None
+        elapsed = (time.monotonic() - started) * 1000
+        self.stats["measured"] += 1
+        self.stats["worst"] = max(self.stats["worst"], round(elapsed))
+        if elapsed > self.budget:
+            self.stats["exceeded"] += 1
+            print(
+                "latency budget exceeded:",
+                stage,
+                "{0:.0f} ms > {1} ms".format(elapsed, self.budget),
+            )
+        return elapsed
@@ -0,0 +1,46 @@
+import json
+import os
+from PyQt6.QtWebEngineCore import QWebEngineScript
+
+BRIDGE_VERSION = 5
+
+## isolated from page scripts, the DOM is still shared
+BRIDGE_WORLD = QWebEngineScript.ScriptWorldId.ApplicationWorld.value
+
+BRIDGE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+    "Resources",
+    "Script",
+    "chessbot_bridge.js",
+)
+
+
+##read the helper library source
+def bridgeSource():
+    with open(BRIDGE_PATH, encoding="utf-8") as source:
+        return source.read()
+
+
+##install the helper library into every page at document creation
+def installBridge(page):
+    script = QWebEngineScript()
+    script.setName("chessBotBridge-v{0}".format(BRIDGE_VERSION))
+    script.setSourceCode(bridgeSource())
+    script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentCreation)
+    script.setWorldId(BRIDGE_WORLD)
+    script.setRunsOnSubFrames(False)
+    page.scripts().insert(script)
+
+
+##JS expression calling ChessBotBridge.<function>(args), arguments are JSON encoded
+def bridgeCall(function, *args):
+    return "ChessBotBridge.{0}({1})".format(
+        function, ", ".join(json.dumps(arg) for arg in args)
+    )
+
+
+##call an entry point of the helper library, result passed to callback
+def runBridge(page, function, *args, callback=None):
+    if callback == None:
+        return page.runJavaScript(bridgeCall(function, *args), BRIDGE_WORLD)
+    return page.runJavaScript(bridgeCall(function, *args), BRIDGE_WORLD, callback)
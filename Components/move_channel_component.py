@@ -0,0 +1,97 @@
+from PyQt6.QtCore import QObject, QFile, QIODevice, pyqtSignal, pyqtSlot
+from PyQt6.QtWebChannel import QWebChannel
+from PyQt6.QtWebEngineCore import QWebEngineScript
+
+from Components.js_bridge_component import BRIDGE_WORLD
+
+## watch the move list and push every new move node to python once its SAN is rendered
+MOVE_OBSERVER_JS = """
+    new QWebChannel(qt.webChannelTransport, function (channel) {
+        let bridge = channel.objects.chessBot;
+        // shared with ChessBotBridge entry points that answer asynchronously
+        window.ChessBotChannel = bridge;
+        ChessBotBridge.channelReady();
+        let sent = 0;
+        let list = null;
+        let listObserver = null;
+
+        function flush() {
+            let nodes = document.querySelectorAll('.move [class~=node]');
+            if (nodes.length < sent)
+                sent = 0;
+            while (sent < nodes.length) {
+                let sanString = ChessBotBridge.childImg(nodes[sent]);
+                if (!sanString)
+                    break;
+                sent++;
+                bridge.pushMove(sent, sanString);
+            }
+        }
+
+        // observe the move list only, the rest of the page (clocks, ads) changes constantly
+        function attach() {
+            let move = document.querySelector('.move');
+            let container = move?.parentElement;
+            if (!container || container === list)
+                return;
+            listObserver?.disconnect();
+            list = container;
+            listObserver = new MutationObserver(flush);
+            listObserver.observe(list, {childList: true, subtree: true, characterData: true});
+            flush();
+        }
+
+        new MutationObserver(function () {
+            if (!list || !list.isConnected)
+                attach();
+        }).observe(document.body, {childList: true, subtree: true});
+        attach();
+        bridge.ready();
+    });
+"""
+
+
+## receive calls from the injected scripts, slots run on the GUI thread
+class PageBridge(QObject):
+    moveAdded = pyqtSignal(int, str)
+    channelReady = pyqtSignal()
+    stepFinished = pyqtSignal(int, str, float)
+
+    @pyqtSlot(int, str)
+    def pushMove(self, ply, sanString):
+        self.moveAdded.emit(ply, sanString)
+
+    @pyqtSlot()
+    def ready(self):
+        self.channelReady.emit()
+
+    @pyqtSlot(int, str, float)
+    def automationDone(self, requestId, result, elapsed):
+        self.stepFinished.emit(requestId, result, elapsed)
+
+
+##read the qwebchannel.js client shipped in Qt resources
+def webChannelClientJs():
+    client = QFile(":/qtwebchannel/qwebchannel.js")
+    if not client.open(QIODevice.OpenModeFlag.ReadOnly):
+        return ""
+    source = bytes(client.readAll()).decode("utf-8")
+    client.close()
+    return source
+
+
+## push-based move notification, the observer is injected once into every loaded page
+class MoveChannel:
+    def __init__(self, page):
+        self.bridge = PageBridge()
+        self.channel = QWebChannel(page)
+        self.channel.registerObject("chessBot", self.bridge)
+        page.setWebChannel(self.channel, BRIDGE_WORLD)
+
+        script = QWebEngineScript()
+        script.setName("chessBotMoveObserver")
+        script.setSourceCode(webChannelClientJs() + MOVE_OBSERVER_JS)
+        script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentReady)
+        script.setWorldId(BRIDGE_WORLD)
+        script.setRunsOnSubFrames(False)
+        page.scripts().insert(script)
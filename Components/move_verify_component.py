@@ -0,0 +1,79 @@
+import time
+from functools import partial
+from PyQt6.QtCore import QTimer
+
+from Components.js_bridge_component import runBridge
+
+
+## confirm through the web view move list that the user's move landed
+class MoveVerifier:
+    DEADLINE = 1500
+    POLL_INTERVAL = 30
+    MAX_ATTEMPTS = 3
+
+    ## upper bounds in ms of the injection to confirmation histogram
+    BUCKETS = [50, 100, 200, 400, 800, 1600]
+
+    def __init__(self, page):
+        self.page = page
+        self.latencies = []
+        self.stats = {"confirmed": 0, "retries": 0, "failed": 0}
+
+    def verify(self, ply, sanString, injectedAt, callback, deadline=None):
+        """
+        This function query the move list until the move is found or the deadline passed\n
+        Parameters :
+            - ply: ply number of the user's move, 1 for white's first move
+            - sanString: SAN of the user's move
+            - injectedAt: time.monotonic() when the move injection started
+            - callback: called with True once the move is in the move list, False after the deadline
+        """
+        if deadline == None:
+            deadline = time.monotonic() + self.DEADLINE / 1000
+
+        def result(x):
+            if not x == None and len(x[1]) > 0:
+                if str(x[1][0]).rstrip("+#") == sanString.rstrip("+#"):
+                    self.record((time.monotonic() - injectedAt) * 1000)
+                    callback(True)
+                    return
+            if time.monotonic() > deadline:
+                callback(False)
+                return
+            QTimer.singleShot(
+                self.POLL_INTERVAL,
+                partial(self.verify, ply, sanString, injectedAt, callback, deadline),
+            )
+
+        runBridge(self.page, "movesAfter", ply - 1, callback=result)
+
+    def record(self, latency):
+        self.stats["confirmed"] += 1
+        self.latencies.append(latency)
+
+    ##the move was not found in time and is injected again
+    def record_retry(self):
+        self.stats["retries"] += 1
+
+    ##the move was given up on and rolled back
+    def record_failure(self):
+        self.stats["failed"] += 1
+
+    ##count of confirmation latencies per bucket, e.g. {"<=50ms": 3, ">1600ms": 0}
+    def histogram(self):
+        counts = dict()
+        for bound in self.BUCKETS:
+            counts["<={0}ms".format(bound)] = 0
+        counts[">{0}ms".format(self.BUCKETS[-1])] = 0
+        for latency in self.latencies:
+            for bound in self.BUCKETS:
+                if latency <= bound:
+                    counts["<={0}ms".format(bound)] += 1
+                    break
+            else:
+                counts[">{0}ms".format(self.BUCKETS[-1])] += 1
+        return counts
+
+    def report(self):
+        print("move verify stats", self.stats)
+        print("move confirm latency", self.histogram())
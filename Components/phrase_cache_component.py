@@ -0,0 +1,167 @@
+import re
+import wave
+import struct
+from functools import partial
+from collections import OrderedDict
+import numpy as np
+from PyQt6.QtCore import QObject, QBuffer, QByteArray, QIODevice, pyqtSignal
+from PyQt6.QtMultimedia import QAudio, QAudioFormat, QAudioSink
+
+## handle_arrow sentences, e.g. "E4" or "E4 white knight"
+FIXED_PHRASE = re.compile(
+    r"^[A-H][1-8]( (white|black) (pawn|knight|bishop|rook|queen|king))?$"
+)
+
+AIFF_FORMS = [b"AIFF", b"AIFC"]
+## AIFF samples are big endian, AIFF-C "sowt" ones little endian
+AIFF_BYTE_ORDER = {b"NONE": ">i2", b"twos": ">i2", b"sowt": "<i2"}
+
+
+## decoded 16 bit PCM of one rendered phrase, kept in memory
+class Clip:
+    def __init__(self, frames, sampleRate, channels):
+        self.frames = frames
+        self.sample_rate = sampleRate
+        self.channels = channels
+
+
+##decode a clip, AIFF rendered by the macOS nsss driver or a 16 bit WAV such as the earcons, None when unsupported
+def loadClip(path):
+    try:
+        with wave.open(path, "rb") as audio:
+            if not audio.getsampwidth() == 2:
+                return None
+            return Clip(
+                audio.readframes(audio.getnframes()),
+                audio.getframerate(),
+                audio.getnchannels(),
+            )
+    except (wave.Error, EOFError):
+        pass
+    with open(path, "rb") as file:
+        return decodeAiff(file.read())
+
+
+##16 bit PCM of an AIFF or uncompressed AIFF-C file, read by hand since aifc left the standard library in 3.13
+def decodeAiff(data):
+    if len(data) < 12 or not data[:4] == b"FORM" or not data[8:12] in AIFF_FORMS:
+        return None
+    chunks = dict()
+    offset = 12
+    while offset + 8 <= len(data):
+        name = data[offset : offset + 4]
+        (size,) = struct.unpack(">I", data[offset + 4 : offset + 8])
+        chunks[name] = data[offset + 8 : offset + 8 + size]
+        ## chunks are padded to an even length
+        offset = offset + 8 + size + size % 2
+    common = chunks.get(b"COMM")
+    sound = chunks.get(b"SSND")
+    if common == None or sound == None or len(common) < 18 or len(sound) < 8:
+        return None
+
+    channels, frameCount, sampleSize = struct.unpack(">hIh", common[:8])
+    compression = common[18:22] if data[8:12] == b"AIFC" else b"NONE"
+    if not sampleSize == 16 or not compression in AIFF_BYTE_ORDER:
+        return None
+    ## sample rate is an 80 bit IEEE extended float
+    exponent, mantissa = struct.unpack(">HQ", common[8:18])
+    sampleRate = round(mantissa * 2.0 ** ((exponent & 0x7FFF) - 16383 - 63))
+
+    (soundOffset,) = struct.unpack(">I", sound[:4])
+    frames = sound[8 + soundOffset : 8 + soundOffset + frameCount * channels * 2]
+    frames = np.frombuffer(frames, AIFF_BYTE_ORDER[compression])
+    return Clip(frames.astype("<i2").tobytes(), sampleRate, channels)
+
+
+## LRU cache of rendered fixed phrases
+class PhraseCache:
+    def __init__(self, fixedPhrases, size=1024):
+        self.fixed = set(fixedPhrases)
+        self.size = size
+        self.clips = OrderedDict()
+        self.pending = set()
+        self.stats = {"hits": 0, "misses": 0, "rendered": 0, "evicted": 0}
+
+    ##only the finite set of fixed sentences is worth rendering
+    def is_fixed(self, sentence):
+        return sentence in self.fixed or not FIXED_PHRASE.match(sentence) == None
+
+    def get(self, sentence):
+        clip = self.clips.get(sentence)
+        if clip == None:
+            if self.is_fixed(sentence):
+                self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self.clips.move_to_end(sentence)
+        return clip
+
+    ##True when the sentence should be queued for rendering
+    def want(self, sentence):
+        if sentence in self.clips or sentence in self.pending:
+            return False
+        if not self.is_fixed(sentence):
+            return False
+        self.pending.add(sentence)
+        return True
+
+    def put(self, sentence, clip):
+        self.pending.discard(sentence)
+        if clip == None:
+            return
+        self.stats["rendered"] += 1
+        self.clips[sentence] = clip
+        if len(self.clips) > self.size:
+            self.clips.popitem(last=False)
+            self.stats["evicted"] += 1
+
+
+## play clips on the GUI thread, the speech thread asks through queued signals
+class ClipPlayer(QObject):
+    playRequested = pyqtSignal(object, object, object)
+    stopRequested = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.sink = None
+        self.buffer = None
+        self.playRequested.connect(self.play)
+        self.stopRequested.connect(self.stop)
+
+    def play(self, clip, finished, started):
+        """
+        Parameters :
+            - clip: Clip to play
+            - finished: threading.Event set once the clip played out or failed, not when stopped
+            - started(): called when audio output started
+        """
+        self.stop()
+        audioFormat = QAudioFormat()
+        audioFormat.setSampleRate(clip.sample_rate)
+        audioFormat.setChannelCount(clip.channels)
+        audioFormat.setSampleFormat(QAudioFormat.SampleFormat.Int16)
+
+        self.buffer = QBuffer()
+        self.buffer.setData(QByteArray(clip.frames))
+        self.buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        self.sink = QAudioSink(audioFormat)
+        self.sink.stateChanged.connect(
+            partial(self.on_state_changed, self.sink, finished, started)
+        )
+        self.sink.start(self.buffer)
+
+    ##a stopped or replaced sink may report late, only the current one ends the clip
+    def on_state_changed(self, sink, finished, started, state):
+        if not sink is self.sink:
+            return
+        if state == QAudio.State.ActiveState:
+            started()
+        elif state in [QAudio.State.IdleState, QAudio.State.StoppedState]:
+            self.stop()
+            finished.set()
+
+    def stop(self):
+        if not self.sink == None:
+            sink = self.sink
+            self.sink = None
+            sink.stop()
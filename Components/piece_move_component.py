@@ -1,25 +1,179 @@
+import time
+from functools import partial
 from PyQt6.QtTest import QTest
 import pyautogui as auto
-from PyQt6.QtWidgets import QApplication
-import time
+from PyQt6.QtCore import (
+    QCoreApplication,
+    QEvent,
+    QObject,
+    QPointF,
+    Qt,
+    QTimer,
+    pyqtSignal,
+)
+from PyQt6.QtGui import QCursor, QMouseEvent
+
+from Components.js_bridge_component import runBridge
+from Utils.enum_helper import Move_backend
+
+## the executor waits on real readiness instead of pyautogui's fixed pause after each call
+auto.PAUSE = 0
+
+
+##chess.com square id of a square name, e.g. "E2" -> "52"
+def squareId(squareName):
+    return "{0}{1}".format(ord(squareName[0].lower()) - ord("a") + 1, squareName[1])
+
+
+## simulate mouse click and move to make piece move on web view, driven by the event loop
+## this backend moves the real cursor with QTest and clicks with pyautogui
+class MoveExecutor(QObject):
+    moveFinished = pyqtSignal(bool)
+
+    WAIT_TIMEOUT = 300
+    POLL_INTERVAL = 15
+
+    backend = Move_backend.cursor
+
+    def __init__(self, page):
+        super().__init__()
+        self.page = page
+        self.busy = False
+
+    def execute(self, targetWidget, destWidget, promoteWidget=None):
+        """
+        This function start the move and return immediately\n
+        Parameters :
+            - targetWidget, destWidget: grid labels named by square, e.g. "E2"
+            - promoteWidget: grid label of the promotion piece, if any
+
+        Returns:
+            - False when another move is still running
+            - moveFinished(landed) is emitted once the piece left its square or the wait timed out
+        """
+        if self.busy:
+            return False
+        self.busy = True
+
+        target = squareId(targetWidget.accessibleName())
+        steps = [
+            partial(self.hover, targetWidget),
+            self.click,
+            partial(self.wait_page, "squareState", [target], self.is_selected),
+            partial(self.hover, destWidget),
+            self.click,
+        ]
+        if not promoteWidget == None:
+            steps += [
+                partial(self.wait_page, "promotionOpen", [], bool),
+                partial(self.hover, promoteWidget),
+                self.click,
+            ]
+        steps.append(partial(self.wait_page, "squareState", [target], self.is_empty))
+        self.run_steps(steps)
+        return True
+
+    def run_steps(self, steps, ok=True):
+        if len(steps) == 0:
+            self.busy = False
+            self.moveFinished.emit(ok)
+            return
+        steps[0](partial(self.run_steps, steps[1:]))
+
+    ##move the cursor and continue once it arrived
+    def hover(self, widget, next):
+        QTest.mouseMove(widget)
+        center = widget.mapToGlobal(widget.rect().center())
+        self.wait_local(lambda: (QCursor.pos() - center).manhattanLength() <= 2, next)
+
+    def click(self, next):
+        auto.leftClick()
+        next(True)
+
+    @staticmethod
+    def is_selected(state):
+        return state != None and state[0]
+
+    @staticmethod
+    def is_empty(state):
+        return state != None and state[1] == None
+
+    def wait_local(self, condition, next, deadline=None):
+        if deadline == None:
+            deadline = time.monotonic() + self.WAIT_TIMEOUT / 1000
+        if condition():
+            next(True)
+        elif time.monotonic() > deadline:
+            next(False)
+        else:
+            QTimer.singleShot(
+                self.POLL_INTERVAL, partial(self.wait_local, condition, next, deadline)
+            )
+
+    ##query the page until predicate(result) holds, continue anyway after the timeout
+    def wait_page(self, function, args, predicate, next, deadline=None):
+        if deadline == None:
+            deadline = time.monotonic() + self.WAIT_TIMEOUT / 1000
+
+        def callback(result):
+            if predicate(result):
+                next(True)
+            elif time.monotonic() > deadline:
+                next(False)
+            else:
+                QTimer.singleShot(
+                    self.POLL_INTERVAL,
+                    partial(self.wait_page, function, args, predicate, next, deadline),
+                )
+
+        runBridge(self.page, function, *args, callback=callback)
+
+
+## same steps, but mouse events are sent straight to the web view's input widget,
+## the user's cursor is left alone and no OS accessibility permission is needed
+class PageEventMoveExecutor(MoveExecutor):
+    backend = Move_backend.page_events
+
+    def __init__(self, page, webView):
+        super().__init__(page)
+        self.webView = webView
+        self.point = None
+
+    ##the render widget that receives input, falls back to the view before it is created
+    def input_widget(self):
+        proxy = self.webView.focusProxy()
+        return self.webView if proxy == None else proxy
+
+    def send_mouse(self, eventType, button, buttons):
+        receiver = self.input_widget()
+        globalPoint = self.point
+        event = QMouseEvent(
+            eventType,
+            QPointF(receiver.mapFromGlobal(globalPoint)),
+            QPointF(globalPoint),
+            button,
+            buttons,
+            Qt.KeyboardModifier.NoModifier,
+        )
+        QCoreApplication.sendEvent(receiver, event)
 
+    ##the grid label geometry is the square geometry found by board detection
+    def hover(self, widget, next):
+        self.point = widget.mapToGlobal(widget.rect().center())
+        self.send_mouse(
+            QEvent.Type.MouseMove, Qt.MouseButton.NoButton, Qt.MouseButton.NoButton
+        )
+        next(True)
 
-##simulate mouse click and move to make piece move on web view
-def widgetDragDrop(targetWidget, destWidget):
-    QTest.mouseMove(targetWidget)
-    time.sleep(0.3)
-    auto.leftClick()
-    time.sleep(0.3)
-    QTest.mouseMove(destWidget)
-    time.sleep(0.3)
-    auto.leftClick()
-    return True
-
-
-##simulate mouse click to select promotion
-def widgetClick(targetWidget):
-    QTest.mouseMove(targetWidget)
-    QApplication.processEvents()
-    auto.leftClick()
-    QApplication.processEvents()
-    return True
+    def click(self, next):
+        self.send_mouse(
+            QEvent.Type.MouseButtonPress,
+            Qt.MouseButton.LeftButton,
+            Qt.MouseButton.LeftButton,
+        )
+        self.send_mouse(
+            QEvent.Type.MouseButtonRelease,
+            Qt.MouseButton.LeftButton,
+            Qt.MouseButton.NoButton,
+        )
+        next(True)
@@ -0,0 +1,122 @@
+import time
+from functools import partial
+from PyQt6.QtCore import QTimer
+
+from Components.js_bridge_component import runBridge
+
+
+## single timer owning every page query, due queries are batched into one JS call per tick
+class PollScheduler:
+    FAST_INTERVAL = 200
+    SLOW_INTERVAL = 2000
+    BACKOFF = 1.5
+
+    def __init__(self, page):
+        self.page = page
+        self.queries = dict()
+        self.fast_interval = self.FAST_INTERVAL
+        self.slow_interval = self.SLOW_INTERVAL
+        self.interval = self.slow_interval
+        self.paused = False
+        self.in_flight = False
+        self.stats = {"ticks": 0, "queries": 0, "results_used": 0}
+
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.tick)
+
+    def register(self, name, function, handler, period=0, args=None):
+        """
+        This function add a page query, disabled until enable(name)\n
+        Parameters :
+            - function: ChessBotBridge entry point
+            - handler(result): return True when the result was used
+            - period: minimum milliseconds between two queries
+            - args(): arguments of the entry point, evaluated on every tick
+        """
+        self.queries[name] = {
+            "function": function,
+            "handler": handler,
+            "period": period / 1000,
+            "args": args,
+            "enabled": False,
+            "due": 0,
+        }
+
+    def enable(self, name):
+        query = self.queries[name]
+        if not query["enabled"]:
+            query["enabled"] = True
+            query["due"] = 0
+        self.schedule()
+
+    def disable(self, name):
+        self.queries[name]["enabled"] = False
+
+    ##bounds of the adaptive interval, tighter for fast time controls
+    def set_intervals(self, fast, slow):
+        self.fast_interval = fast
+        self.slow_interval = slow
+        self.interval = min(self.interval, slow)
+
+    ##poll fast right after the user moved, backing off while the opponent thinks
+    def burst(self):
+        self.interval = self.fast_interval
+        self.timer.start(0)
+
+    ##nothing expected soon, e.g. user's turn
+    def relax(self):
+        self.interval = self.slow_interval
+
+    ##user is composing input
+    def pause(self):
+        self.paused = True
+        self.timer.stop()
+
+    def resume(self):
+        if self.paused:
+            self.paused = False
+            self.schedule()
+
+    def schedule(self):
+        if self.paused or not any(q["enabled"] for q in self.queries.values()):
+            self.timer.stop()
+            return
+        if not self.timer.isActive():
+            self.timer.start(int(self.interval))
+
+    def tick(self):
+        if self.paused:
+            return
+        if not self.in_flight:
+            now = time.monotonic()
+            names = [
+                name
+                for name, query in self.queries.items()
+                if query["enabled"] and query["due"] <= now
+            ]
+            if len(names) > 0:
+                batch = []
+                for name in names:
+                    query = self.queries[name]
+                    query["due"] = now + query["period"]
+                    args = query["args"]() if query["args"] else []
+                    batch.append([query["function"]] + list(args))
+                self.in_flight = True
+                self.stats["ticks"] += 1
+                self.stats["queries"] += len(batch)
+                runBridge(
+                    self.page, "batch", batch, callback=partial(self.dispatch, names)
+                )
+
+        self.interval = min(self.interval * self.BACKOFF, self.slow_interval)
+        self.schedule()
+
+    def dispatch(self, names, results):
+        self.in_flight = False
+        if results == None:
+            results = [None] * len(names)
+        for name, result in zip(names, results):
+            query = self.queries[name]
+            if query["enabled"] and query["handler"](result):
+                self.stats["results_used"] += 1
@@ -0,0 +1,58 @@
+import re
+import chess
+
+from Components.js_bridge_component import runBridge
+
+PIECE_CLASS = re.compile(r"\b([wb])([pnbrqk])\b")
+SQUARE_CLASS = re.compile(r"\bsquare-([1-8])([1-8])\b")
+
+
+##build the FEN piece placement from the piece element classes
+def piecesToBoardFen(pieceClasses):
+    board = chess.BaseBoard.empty()
+    for className in pieceClasses:
+        piece = PIECE_CLASS.search(className)
+        square = SQUARE_CLASS.search(className)
+        if piece is None or square is None:
+            continue
+        symbol = piece.group(2).upper() if piece.group(1) == "w" else piece.group(2)
+        board.set_piece_at(
+            chess.square(int(square.group(1)) - 1, int(square.group(2)) - 1),
+            chess.Piece.from_symbol(symbol),
+        )
+    return board.board_fen()
+
+
+## read the whole position and orientation of the web view chessboard in one JS call
+class PositionReader:
+    def __init__(self, webView):
+        self.webView = webView
+
+    def read(self, callback):
+        """
+        This function read the web view chessboard\n
+        Parameters :
+            - callback(snapshot)
+
+        Returns (through callback):
+            success:
+                -dict(fen=board FEN, flipped=bool, color=user color "WHITE" / "BLACK")
+            fails:
+                -None
+        """
+
+        def jsCallback(result):
+            callback(self.toSnapshot(result))
+
+        # piece classes, e.g. "piece wp square-52", and the board orientation
+        runBridge(self.webView.page(), "readPosition", callback=jsCallback)
+
+    def toSnapshot(self, result):
+        if not result or len(result) != 2 or not result[0]:
+            return None
+        pieceClasses, flipped = result
+        return {
+            "fen": piecesToBoardFen(pieceClasses),
+            "flipped": bool(flipped),
+            "color": "BLACK" if flipped else "WHITE",
+        }
@@ -0,0 +1,61 @@
+from functools import partial
+
+from Components.js_bridge_component import runBridge
+
+
+## compare the mirrored chessboard with the web view move list and repair drift
+class PositionReconciler:
+    def __init__(self, webView):
+        self.webView = webView
+        self.stats = {
+            "checks": 0,
+            "drifts": 0,
+            "missed_plies": 0,
+            "dropped_plies": 0,
+            "failed": 0,
+        }
+
+    def check(self, chessBoard, callback):
+        """
+        This function compare fingerprints and rebuild the mirror on mismatch\n
+        Parameters :
+            - chessBoard: mirrored ChessBoard
+            - callback(missed): called only when the mirror was rebuilt
+
+        Returns (through callback):
+            - list of missed UCI strings to replay on the rebuilt mirror
+        """
+        # number of plies and the last SAN in the move list
+        runBridge(
+            self.webView.page(),
+            "fingerprint",
+            callback=partial(self.compare, chessBoard, callback),
+        )
+
+    ##compare a fingerprint already fetched, e.g. by the poll scheduler
+    def compare(self, chessBoard, callback, fingerprint):
+        self.stats["checks"] += 1
+        if not fingerprint or fingerprint[0] == None:
+            return False
+        ply, lastSan = fingerprint
+        if chessBoard.matches_fingerprint(ply, lastSan):
+            return False
+
+        def moveListCallback(sanList):
+            if sanList == None or None in sanList:
+                return
+            missed = chessBoard.rebuild(sanList)
+            if isinstance(missed, Exception):
+                self.stats["failed"] += 1
+                print("reconcile failed", missed, self.stats)
+                return
+            if missed == None:
+                return
+            self.stats["drifts"] += 1
+            self.stats["missed_plies"] += len(missed[0])
+            self.stats["dropped_plies"] += missed[1]
+            print("position drift", missed, self.stats)
+            callback(missed[0])
+
+        runBridge(self.webView.page(), "moveList", callback=moveListCallback)
+        return True
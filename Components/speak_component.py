@@ -1,38 +1,279 @@
-import pyttsx3
 import threading
 import queue
+import itertools
+import os
+import tempfile
 import time
 
+from Utils.enum_helper import Speech_category
 
-## Text-to-speech engine that run in another thread
+
+## Text-to-speech engine that run in another thread, idle until a sentence is queued
 class TTSThread(threading.Thread):
+    IMPORTANT = 0
+    NORMAL = 1
+    RENDER = 2
+
+    ## how often the engine's external loop is pumped while a sentence is spoken
+    ITERATE_INTERVAL = 0.01
+    ## a fixed phrase renders well under a second
+    RENDER_TIMEOUT = 3
+
+    ## minimum seconds between two sentences of a category starting
+    RATE_LIMIT = {Speech_category.navigation: 0.1, Speech_category.query: 0.25}
 
     ##auto start and loop until application close
-    def __init__(self):
+    def __init__(self, backend):
+        """
+        Parameters :
+            - backend: SpeechBackend the sentences are spoken with
+        """
         threading.Thread.__init__(self)
-        self.importance = False
-        self.queue = queue.Queue()
+        self.queue = queue.PriorityQueue()
         self.daemon = True
-        self.tts_engine = pyttsx3.init("nsss")
-        self.tts_engine.setProperty("rate", 190)
-        self.tts_engine.setProperty("volume", 0.7)
-        self.tts_engine.startLoop(False)
+        self.order = itertools.count()
+        self.lock = threading.Lock()
+
+        ## normal sentences queued before the latest one of their category are stale
+        self.generation = itertools.count(1)
+        self.latest = dict()
+        self.last_started = dict()
+        self.current = None
+        self.interrupt = threading.Event()
+        self.finished = threading.Event()
+        ## per sentence, reset by run() before each one
+        self.first_audio_recorded = False
+        self.error = None
+        self.stats = {"spoken": 0, "interrupted": 0}
+        self.dropped = {category: 0 for category in Speech_category}
+
+        ## milliseconds from say() to the first audio, per path
+        self.first_audio = {"cache": [], "live": []}
+        self.cache = None
+        self.player = None
+        self.render_dir = None
+
+        self.backend = backend
+        self.backend.connect(self.on_started, self.on_finished, self.on_error)
         self.start()
 
+    ##play fixed phrases from rendered clips, the player lives on the GUI thread
+    def attach_cache(self, cache, player):
+        self.render_dir = tempfile.mkdtemp(prefix="chessbot_phrases_")
+        self.player = player
+        self.cache = cache
+
+    ##render phrases in the background before they are first needed
+    def warm(self, sentences):
+        for sentence in sentences:
+            self.queue_render(sentence)
+
+    def queue_render(self, sentence):
+        if not self.cache == None and self.cache.want(sentence):
+            self.queue.put(
+                (
+                    self.RENDER,
+                    next(self.order),
+                    sentence,
+                    None,
+                    time.monotonic(),
+                    None,
+                )
+            )
+
+    def say(self, sentence, importance=False, category=Speech_category.general):
+        """
+        This function queue a sentence, called from the GUI thread\n
+        Parameters :
+            - sentence
+            - importance: important sentences are spoken first, never interrupted nor replaced
+            - category: a normal sentence replaces the queued normal one of its category
+              and interrupts it while spoken, an important one interrupts any normal sentence
+        """
+        enqueued = time.monotonic()
+        with self.lock:
+            order = next(self.order)
+            self.backend.enqueued(str(order), sentence)
+            if importance:
+                self.queue.put(
+                    (self.IMPORTANT, order, sentence, None, enqueued, category)
+                )
+            else:
+                generation = next(self.generation)
+                self.latest[category] = generation
+                self.queue.put(
+                    (self.NORMAL, order, sentence, generation, enqueued, category)
+                )
+            ## a render gives way to any sentence, only a normal sentence being spoken can be cut short
+            if not self.current == None and (
+                self.current[0] == self.RENDER
+                or (
+                    self.current[0] == self.NORMAL
+                    and (importance or self.current[5] == category)
+                )
+            ):
+                self.interrupt.set()
+        ## spoken live this time, from the cache next time
+        self.queue_render(sentence)
+
+    def on_started(self, name):
+        self.record_first_audio("live", name)
+
+    def record_first_audio(self, path, name):
+        with self.lock:
+            current = self.current
+            if current == None or not name == str(current[1]):
+                return
+            if current[0] == self.RENDER or self.first_audio_recorded:
+                return
+            self.first_audio_recorded = True
+        self.first_audio[path].append((time.monotonic() - current[4]) * 1000)
+
+    ##a stopped utterance may report late, only the current one ends the wait
+    def on_finished(self, name, completed):
+        with self.lock:
+            if not self.current == None and name == str(self.current[1]):
+                self.finished.set()
+
+    ##the engine reports driver exceptions instead of raising them
+    def on_error(self, name, exception):
+        with self.lock:
+            if not self.current == None and name == str(self.current[1]):
+                self.error = exception
+                self.finished.set()
+
+    ##a normal sentence is stale once a newer one of its category was queued
+    def is_stale(self, item):
+        priority, order, sentence, generation, enqueued, category = item
+        if not priority == self.NORMAL or generation == self.latest.get(category):
+            return False
+        self.dropped[category] += 1
+        self.backend.dropped(str(order))
+        return True
+
+    ##an important sentence queued while a normal one waited for its rate limit goes first
+    def is_preempted(self, item):
+        with self.queue.mutex:
+            return len(self.queue.queue) > 0 and self.queue.queue[0] < item
+
+    ##hold a sentence until its category may start again, a newer one may replace it meanwhile
+    def wait_rate_limit(self, category):
+        limit = self.RATE_LIMIT.get(category)
+        if limit == None:
+            return
+        remaining = self.last_started.get(category, 0) + limit - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
     def run(self):
-        self.tts_engine.iterate()
-        t_running = True
-        while t_running:
-            if self.queue.empty():
-                self.tts_engine.iterate()
+        while True:
+            ## blocks without using the CPU until something is queued
+            item = self.queue.get()
+            priority, order, sentence, generation, enqueued, category = item
+            if priority == self.NORMAL:
+                self.wait_rate_limit(category)
+            with self.lock:
+                if self.is_stale(item):
+                    continue
+                if self.is_preempted(item):
+                    self.queue.put(item)
+                    continue
+                if not category == None:
+                    self.last_started[category] = time.monotonic()
+                self.current = item
+                self.first_audio_recorded = False
+                self.error = None
+                self.interrupt.clear()
+                self.finished.clear()
+
+            if priority == self.RENDER:
+                self.render(sentence, str(order))
             else:
+                clip = None if self.cache == None else self.cache.get(sentence)
+                if clip == None:
+                    self.speak_live(sentence, str(order))
+                else:
+                    self.play_clip(clip, str(order))
+
+            with self.lock:
+                self.current = None
+
+    def speak_live(self, sentence, name):
+        self.backend.say(sentence, name)
+        while not self.finished.is_set():
+            self.backend.iterate()
+            if self.interrupt.is_set():
+                self.backend.stop()
+                self.stats["interrupted"] += 1
+                return
+            self.finished.wait(self.ITERATE_INTERVAL)
+        self.stats["spoken"] += 1
+
+    def play_clip(self, clip, name):
+        self.player.playRequested.emit(
+            clip, self.finished, lambda: self.record_first_audio("cache", name)
+        )
+        while not self.finished.wait(self.ITERATE_INTERVAL):
+            if self.interrupt.is_set():
+                self.player.stopRequested.emit()
+                self.stats["interrupted"] += 1
+                return
+        self.stats["spoken"] += 1
+
+    ##synthesize a fixed phrase to a file with the same engine and decode it into the cache
+    def render(self, sentence, name):
+        ## imported here, the phrase cache needs QtMultimedia and the headless backends do not
+        from Components.phrase_cache_component import loadClip
 
-                data = self.queue.get()
-                self.tts_engine.stop()
-                self.tts_engine.say(data[0])
+        path = os.path.join(self.render_dir, name + ".audio")
+        deadline = time.monotonic() + self.RENDER_TIMEOUT
+        self.backend.save_to_file(sentence, path, name)
+        while not self.finished.is_set() and time.monotonic() < deadline:
+            self.backend.iterate()
+            if self.interrupt.is_set():
+                self.backend.stop()
+                if os.path.exists(path):
+                    os.remove(path)
+                ## still pending in the cache, rendered again once nothing waits to be spoken
+                self.queue.put(
+                    (
+                        self.RENDER,
+                        next(self.order),
+                        sentence,
+                        None,
+                        time.monotonic(),
+                        None,
+                    )
+                )
+                return
+            self.finished.wait(self.ITERATE_INTERVAL)
 
-                ##when the message's important flag = true -> can not be interrupt
-                if data[1] == True:
-                    time.sleep(2)
+        clip = None
+        if isinstance(self.error, NotImplementedError):
+            ## e.g. the espeak driver can not render to a file, keep speaking live
+            print("speech driver can not render phrases, phrase cache disabled")
+            self.cache = None
+        elif self.finished.is_set() and self.error == None and os.path.exists(path):
+            clip = loadClip(path)
+        else:
+            print("phrase render failed", sentence, self.error)
+        if os.path.exists(path):
+            os.remove(path)
+        if not self.cache == None:
+            self.cache.put(sentence, clip)
 
-        self.tts_engine.endLoop()
+    ##mean time to first audio of each path, drops per category and the cache counters
+    def report(self):
+        report = dict(self.stats)
+        report["dropped"] = {
+            category.value: count for category, count in self.dropped.items() if count
+        }
+        for path, samples in self.first_audio.items():
+            if len(samples) > 0:
+                report["first_audio_" + path] = round(sum(samples) / len(samples))
+        if not self.cache == None:
+            report["cache"] = self.cache.stats
+        backend = self.backend.report()
+        if len(backend) > 0:
+            report["backend"] = backend
+        return report
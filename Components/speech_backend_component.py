@@ -0,0 +1,179 @@
+import sys
+import time
+
+from Utils.enum_helper import Speech_backend
+
+
+## what TTSThread drives, callbacks are started(name), finished(name, completed) and error(name, exception)
+class SpeechBackend:
+    def connect(self, started, finished, error):
+        self.on_started = started
+        self.on_finished = finished
+        self.on_error = error
+
+    ##a sentence was queued, it may still be dropped before it is spoken
+    def enqueued(self, name, sentence):
+        pass
+
+    ##a queued sentence was replaced by a newer one of its category
+    def dropped(self, name):
+        pass
+
+    def say(self, sentence, name):
+        raise NotImplementedError
+
+    ##pump pending callbacks, called from the speech thread while a sentence is spoken
+    def iterate(self):
+        pass
+
+    def stop(self):
+        pass
+
+    ##backends that can not render report it through the error callback
+    def save_to_file(self, sentence, path, name):
+        self.on_error(name, NotImplementedError("save_to_file"))
+
+    def report(self):
+        return dict()
+
+
+## pyttsx3 with its external loop, driverName None picks nsss, sapi5 or espeak for the platform
+class Pyttsx3Backend(SpeechBackend):
+    def __init__(self, driverName=None, rate=190, volume=0.7):
+        import pyttsx3
+
+        self.engine = pyttsx3.init(driverName)
+        self.engine.setProperty("rate", rate)
+        self.engine.setProperty("volume", volume)
+        self.driver_name = driverName
+
+    def connect(self, started, finished, error):
+        super().connect(started, finished, error)
+        self.engine.connect("started-utterance", started)
+        self.engine.connect("finished-utterance", finished)
+        self.engine.connect("error", error)
+        self.engine.startLoop(False)
+
+    def say(self, sentence, name):
+        self.engine.say(sentence, name)
+
+    def iterate(self):
+        self.engine.iterate()
+
+    def stop(self):
+        self.engine.stop()
+
+    def save_to_file(self, sentence, path, name):
+        self.engine.save_to_file(sentence, path, name)
+
+
+## speaks nothing, every sentence finishes on the next iterate
+class NullBackend(SpeechBackend):
+    def __init__(self):
+        self.current = None
+
+    def say(self, sentence, name):
+        self.current = name
+
+    def iterate(self):
+        if not self.current == None:
+            name = self.current
+            self.current = None
+            self.on_started(name)
+            self.on_finished(name, True)
+
+    def stop(self):
+        self.current = None
+
+
+## speaks nothing but lasts as long as the sentence would at the speech rate, keeps
+## enqueue, start and end timestamps of every utterance for headless benchmarks
+class RecordingBackend(SpeechBackend):
+    def __init__(self, rate=190):
+        """
+        Parameters :
+            - rate: words per minute the utterance duration is simulated at, 0 to finish at once
+        """
+        self.rate = rate
+        self.current = None
+        self.utterances = dict()
+
+    def enqueued(self, name, sentence):
+        self.utterances[name] = {
+            "sentence": sentence,
+            "enqueued": time.monotonic(),
+            "started": None,
+            "ended": None,
+            "interrupted": False,
+            "dropped": False,
+        }
+
+    def dropped(self, name):
+        if name in self.utterances:
+            self.utterances[name]["dropped"] = True
+
+    def duration(self, sentence):
+        if self.rate == 0:
+            return 0
+        return len(sentence.split()) * 60 / self.rate
+
+    def say(self, sentence, name):
+        if not name in self.utterances:
+            self.enqueued(name, sentence)
+        utterance = self.utterances[name]
+        utterance["started"] = time.monotonic()
+        self.current = (name, utterance["started"] + self.duration(sentence))
+        self.on_started(name)
+
+    def iterate(self):
+        if not self.current == None and time.monotonic() >= self.current[1]:
+            name = self.current[0]
+            self.current = None
+            self.utterances[name]["ended"] = time.monotonic()
+            self.on_finished(name, True)
+
+    def stop(self):
+        if not self.current == None:
+            utterance = self.utterances[self.current[0]]
+            utterance["ended"] = time.monotonic()
+            utterance["interrupted"] = True
+            self.current = None
+
+    def report(self):
+        """
+        This function summarise the recorded utterances\n
+        Returns:
+            - dict of counts and the mean/worst enqueue to start milliseconds
+        """
+        spoken = [
+            utterance
+            for utterance in self.utterances.values()
+            if not utterance["started"] == None
+        ]
+        waits = [(u["started"] - u["enqueued"]) * 1000 for u in spoken]
+        report = {
+            "enqueued": len(self.utterances),
+            "spoken": len(spoken),
+            "interrupted": sum(u["interrupted"] for u in spoken),
+            "dropped": sum(u["dropped"] for u in self.utterances.values()),
+        }
+        if len(waits) > 0:
+            report["start_mean"] = round(sum(waits) / len(waits), 1)
+            report["start_worst"] = round(max(waits), 1)
+        return report
+
+
+##build the backend, pyttsx3 falls back to the null backend when no driver can load
+def createBackend(kind=Speech_backend.pyttsx3):
+    match kind:
+        case Speech_backend.null:
+            return NullBackend()
+        case Speech_backend.recording:
+            return RecordingBackend()
+        case _:
+            try:
+                return Pyttsx3Backend()
+            except Exception as exception:
+                ## e.g. espeak is not installed on Linux
+                print("speech driver failed to load on", sys.platform, exception)
+                return NullBackend()
@@ -0,0 +1,83 @@
+from functools import partial
+from PyQt6.QtCore import QTimer
+
+from Components.js_bridge_component import runBridge
+
+
+## click through chess.com flows, each step waits in page for its element instead of fixed delays
+class WebAutomation:
+    STEP_TIMEOUT = 6000
+    OPTIONAL_STEP_TIMEOUT = 1500
+
+    def __init__(self, page, bridge):
+        self.page = page
+        self.pending = dict()
+        self.next_id = 0
+        self.latency = dict()
+        bridge.stepFinished.connect(self.on_step_finished)
+
+    def run(self, steps, finalCallback, timeout=STEP_TIMEOUT):
+        """
+        This function click the steps in order, the next step starts as soon as one resolves\n
+        Parameters :
+            - steps: list of (tag, text) or (tag, text, True) for an exact text match
+            - finalCallback: called after the last step
+            - timeout: milliseconds to wait for each element, short for optional steps
+        """
+        self.click_step(steps, 0, finalCallback, timeout)
+
+    def click_step(self, steps, index, finalCallback, timeout):
+        if index >= len(steps):
+            print("click finished")
+            finalCallback()
+            return
+
+        requestId = self.next_id
+        self.next_id += 1
+
+        ## the page answers through the web channel, fall back when it never does
+        fallback = QTimer()
+        fallback.setSingleShot(True)
+        fallback.timeout.connect(
+            partial(self.on_step_finished, requestId, "", float(timeout))
+        )
+        fallback.start(timeout + 1000)
+        self.pending[requestId] = (steps, index, finalCallback, timeout, fallback)
+
+        step = steps[index]
+        runBridge(
+            self.page,
+            "clickWhenReady",
+            requestId,
+            step[0],
+            step[1].lower(),
+            len(step) == 3,
+            timeout,
+        )
+
+    def on_step_finished(self, requestId, result, elapsed):
+        entry = self.pending.pop(requestId, None)
+        if entry == None:
+            return
+        steps, index, finalCallback, timeout, fallback = entry
+        fallback.stop()
+
+        ## a step that timed out is skipped, as the old retry chain did after 6 retries
+        label = "{0}:{1}".format(steps[index][0], steps[index][1].lower())
+        self.latency.setdefault(label, []).append(elapsed)
+        print(
+            "web step",
+            label,
+            "clicked" if result else "timeout",
+            "{0:.0f} ms".format(elapsed),
+        )
+        self.click_step(steps, index + 1, finalCallback, timeout)
+        if index + 1 >= len(steps):
+            print("web step latency", self.report())
+
+    ##mean latency per step, to see which step of the chess.com flow is slow
+    def report(self):
+        return {
+            label: round(sum(samples) / len(samples))
+            for label, samples in self.latency.items()
+        }
@@ -0,0 +1,194 @@
+// ChessBot helper library, injected once per page at document creation in an isolated world.
+// Python calls the small entry points on ChessBotBridge instead of sending source every tick.
+(function () {
+    const VERSION = 5;
+    if (window.ChessBotBridge && window.ChessBotBridge.version >= VERSION)
+        return;
+
+    // SAN text of a move node, piece icons carry the letter in data-figurine
+    function childImg(move) {
+        let sanString = '';
+        if (!move)
+            return null;
+        for (let i of move.childNodes) {
+            sanString += i?.textContent || i?.getAttribute?.('data-figurine') || '';
+        }
+        return sanString;
+    }
+
+    function moveNodes() {
+        return Array.from(document.querySelectorAll('.move [class~=node]'));
+    }
+
+    function boardElement() {
+        return document.querySelector('wc-chess-board, chess-board, .board');
+    }
+
+    // result text (e.g. "1-0") of the last move row once the game ended
+    function resultText() {
+        let rows = document.querySelectorAll('.move');
+        let results = rows[rows.length - 1]?.querySelectorAll('[class*=result]') || [];
+        return Array.from(results, r => r.outerText).join(' ') || null;
+    }
+
+    function findButton(selector, text, exact, enabledOnly) {
+        for (let but of document.querySelectorAll(selector)) {
+            if (enabledOnly && (but.disabled || but.getAttribute('aria-disabled') == 'true'))
+                continue;
+            let labels = [but?.textContent, but?.innerText].map(t => t?.trim()?.toLowerCase() || '');
+            if (labels.some(label => exact ? label == text : label.includes(text)))
+                return but;
+        }
+        return null;
+    }
+
+    // automation reports sent before the web channel handshake finished
+    let pendingReports = [];
+
+    function reportAutomation(id, text, elapsed) {
+        if (window.ChessBotChannel)
+            window.ChessBotChannel.automationDone(id, text, elapsed);
+        else
+            pendingReports.push([id, text, elapsed]);
+    }
+
+    window.ChessBotBridge = {
+        version: VERSION,
+        childImg: childImg,
+
+        // run several entry points in one call, each query is [name, ...args]
+        batch: function (queries) {
+            return queries.map(function (query) {
+                try {
+                    return window.ChessBotBridge[query[0]](...query.slice(1)) ?? null;
+                } catch (e) {
+                    return null;
+                }
+            });
+        },
+
+        // [white SAN, black SAN] of the last move row
+        lastMoves: function () {
+            let rows = document.querySelectorAll('.move');
+            let nodes = rows[rows.length - 1]?.querySelectorAll('[class~=node]') || [];
+            return [childImg(nodes[0]), childImg(nodes[1])];
+        },
+
+        // [ply, SAN of every move node after ply, result]
+        movesAfter: function (ply) {
+            return [ply, moveNodes().slice(ply).map(childImg), resultText()];
+        },
+
+        moveList: function () {
+            return moveNodes().map(childImg);
+        },
+
+        // [number of plies, last SAN]
+        fingerprint: function () {
+            let nodes = moveNodes();
+            return [nodes.length, childImg(nodes[nodes.length - 1])];
+        },
+
+        // board rect in CSS pixels relative to the viewport
+        boardRect: function () {
+            let board = boardElement();
+            if (!board)
+                return null;
+            let rect = board.getBoundingClientRect();
+            return [rect.left, rect.top, rect.width, rect.height, window.devicePixelRatio];
+        },
+
+        // [piece classes e.g. "piece wp square-52", flipped]
+        readPosition: function () {
+            let board = boardElement();
+            if (!board)
+                return null;
+            return [
+                Array.from(board.querySelectorAll('.piece'), piece => piece.className),
+                board.classList.contains('flipped'),
+            ];
+        },
+
+        // [highlighted, piece class] of a square id such as "52" for e2
+        squareState: function (square) {
+            let board = boardElement();
+            if (!board)
+                return null;
+            let piece = board.querySelector('.piece.square-' + square);
+            return [
+                board.querySelector('.highlight.square-' + square) != null,
+                piece ? piece.className : null,
+            ];
+        },
+
+        promotionOpen: function () {
+            return document.querySelector('.promotion-window') != null;
+        },
+
+        checkLogin: function () {
+            return document.querySelector('.home-user-info')?.outerText;
+        },
+
+        // [top clock, bottom clock]
+        checkTime: function () {
+            let clocks = document.querySelectorAll('.clock-time-monospace');
+            if (clocks.length < 2)
+                return null;
+            return [clocks[0].outerText, clocks[1].outerText];
+        },
+
+        // [rating, league] shown after a rated game
+        checkScore: function () {
+            let rating = document.querySelectorAll('.rating-score-component')[1];
+            let league = document.querySelectorAll('.league-score-component')[0];
+            if (!rating || !league)
+                return null;
+            return [rating.textContent?.trim() || null, league.textContent?.trim() || null];
+        },
+
+        // click the first element whose text equals (exact) or contains the given text
+        clickButton: function (selector, text, exact) {
+            let but = findButton(selector, text, exact, false);
+            if (!but)
+                return false;
+            but.click();
+            return text;
+        },
+
+        // wait until the element exists and is enabled, click it, then report
+        // automationDone(id, text or '', elapsed ms) through the web channel, once it is ready
+        clickWhenReady: function (id, selector, text, exact, timeout) {
+            let start = performance.now();
+            new Promise(function (resolve) {
+                let but = findButton(selector, text, exact, true);
+                if (but)
+                    return resolve(but);
+                let observer = new MutationObserver(function () {
+                    let but = findButton(selector, text, exact, true);
+                    if (but) {
+                        observer.disconnect();
+                        clearTimeout(timer);
+                        resolve(but);
+                    }
+                });
+                let timer = setTimeout(function () {
+                    observer.disconnect();
+                    resolve(null);
+                }, timeout);
+                observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+            }).then(function (but) {
+                but?.click();
+                reportAutomation(id, but ? text : '', performance.now() - start);
+            });
+            return id;
+        },
+
+        // called by the web channel handshake, sends the reports queued before it
+        channelReady: function () {
+            let reports = pendingReports;
+            pendingReports = [];
+            for (let report of reports)
+                window.ChessBotChannel.automationDone(...report);
+        },
+    };
+})();
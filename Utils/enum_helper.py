@@ -58,3 +58,54 @@ class Speak_template(Enum):
         "You are playing as black. Please wait for your opponent's move."
     )
     user_white_side_sentense = "You are playing as white. Please make your first move."
+
+
+class Board_locate_source(Enum):
+    # which path found the chessboard geometry
+    dom = "DOM"
+    cv = "CV"
+
+
+class Move_backend(Enum):
+    # how the user's move is played on the web page
+    page_events = "PAGE_EVENTS"
+    cursor = "CURSOR"
+
+
+class Time_control(Enum):
+    # chess.com button text of the time control
+    classical = "30 min"
+    blitz = "3 min"
+    bullet = "1 min"
+
+
+class Speech_category(Enum):
+    # a newer sentence replaces the queued one of the same category
+    navigation = "NAVIGATION"
+    query = "QUERY"
+    opponent_move = "OPPONENT_MOVE"
+    alert = "ALERT"
+    general = "GENERAL"
+
+
+class Speech_backend(Enum):
+    # chosen with the CHESSBOT_SPEECH environment variable
+    pyttsx3 = "PYTTSX3"
+    null = "NULL"
+    recording = "RECORDING"
+
+
+class Earcon(Enum):
+    # sound cue files under Resources/Sound
+    check = "check.wav"
+    capture = "capture.wav"
+    illegal = "illegal.wav"
+    your_turn = "your_turn.wav"
+    low_time = "low_time.wav"
+
+
+class Verbosity(Enum):
+    # wording of move announcements and board queries
+    full = "FULL"
+    brief = "BRIEF"
+    terse = "TERSE"
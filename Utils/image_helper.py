@@ -0,0 +1,34 @@
+import numpy as np
+from PyQt6.QtGui import QImage
+
+## QImage formats whose memory layout is already B, G, R, A per pixel (little-endian)
+BGRA_FORMATS = (
+    QImage.Format.Format_RGB32,
+    QImage.Format.Format_ARGB32,
+    QImage.Format.Format_ARGB32_Premultiplied,
+)
+
+
+##wrap the QImage pixel buffer as a (height, width, 4) BGRA numpy array without copy
+def qimageToArray(image):
+    """
+    The array is a view on the image memory, keep the returned QImage alive while using it\n
+    Parameters :
+        - image: QImage, or QPixmap which is converted to QImage first
+
+    Returns:
+        - turple(QImage owning the buffer, numpy array (height, width, 4) in BGRA order)
+    """
+    if not isinstance(image, QImage):
+        image = image.toImage()
+    if image.format() not in BGRA_FORMATS:
+        image = image.convertToFormat(QImage.Format.Format_RGB32)
+
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    buffer = np.frombuffer(bits, dtype=np.uint8)
+
+    # each row may be padded, so slice the visible pixels out of the stride
+    rows = buffer.reshape(image.height(), image.bytesPerLine())
+    array = rows[:, : image.width() * 4].reshape(image.height(), image.width(), 4)
+    return (image, array)
@@ -1,5 +1,6 @@
 import sys
 import os
+import time
 from functools import partial
 from PyQt6.QtWidgets import (
     QVBoxLayout,
@@ -17,20 +18,38 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage
-from PyQt6.QtCore import QUrl, Qt, QTimer, QRect
+from PyQt6.QtCore import QUrl, Qt, QTimer
 from PyQt6.QtGui import QFont, QShortcut, QKeySequence, QIcon
 
 
-from Components.board_detection_component import detectChessboard, userColor
-from Components.piece_move_component import widgetDragDrop, widgetClick
+from Components.board_detection_component import userColor
+from Components.board_locator_component import BoardLocator
+from Components.position_reader_component import PositionReader
+from Components.reconcile_component import PositionReconciler
+from Components.js_bridge_component import installBridge, runBridge
+from Components.move_channel_component import MoveChannel
+from Components.poll_scheduler_component import PollScheduler
+from Components.web_automation_component import WebAutomation
+from Components.piece_move_component import MoveExecutor, PageEventMoveExecutor
+from Components.move_verify_component import MoveVerifier
+from Components.game_profile_component import PROFILES, LatencyBudget, clockSeconds
 from Components.chess_validation_component import ChessBoard
 from Components.speak_component import TTSThread
+from Components.speech_backend_component import createBackend
+from Components.phrase_cache_component import PhraseCache, ClipPlayer
+from Components.earcon_component import EarconPlayer
+from Utils.image_helper import qimageToArray
 from Utils.enum_helper import (
     Input_mode,
     Bot_flow_status,
     Game_flow_status,
     Speak_template,
     Game_play_mode,
+    Time_control,
+    Speech_category,
+    Speech_backend,
+    Earcon,
+    Verbosity,
 )
 
 PIECE_TYPE_CONVERSION = {
@@ -43,6 +62,49 @@ PIECE_TYPE_CONVERSION = {
     "none": "empty",
 }
 
+## board query sentences of each verbosity, compiled once, terse ones drop counts and filler words
+QUERY_TEMPLATES = {
+    Verbosity.full: {
+        "group": "{count} {names} {SQUARES}".format,
+        "pieces": "{color} pieces <> {groups}".format,
+        "located": "{count} {color} {names} {SQUARES}".format,
+        "not_found": "NO {color} {name} found".format,
+        "attacker": "{color} {piece} {SQUARE}".format,
+        "attacked": "{SQUARE} attacked by <> {attackers}".format,
+        "not_attacked": "no piece attacks {SQUARE}".format,
+        "status": "{color} to move <> {legal_moves} legal moves".format,
+        "in_check": " <> in check".format,
+        "repeated": " <> position repeated {repetitions} times".format,
+        "fifty_moves": " <> fifty move draw can be claimed".format,
+    },
+    Verbosity.brief: {
+        "group": "{count} {names} {squares}".format,
+        "pieces": "{color} <> {groups}".format,
+        "located": "{count} {color} {names} {squares}".format,
+        "not_found": "no {color} {name}".format,
+        "attacker": "{color} {piece} {square}".format,
+        "attacked": "{square} attacked by <> {attackers}".format,
+        "not_attacked": "{square} not attacked".format,
+        "status": "{color} to move <> {legal_moves} moves".format,
+        "in_check": " <> check".format,
+        "repeated": " <> repeated {repetitions} times".format,
+        "fifty_moves": " <> fifty moves".format,
+    },
+    Verbosity.terse: {
+        "group": "{names} {squares}".format,
+        "pieces": "{color} <> {groups}".format,
+        "located": "{color} {squares}".format,
+        "not_found": "no {color} {name}".format,
+        "attacker": "{color} {piece} {square}".format,
+        "attacked": "{square} <> {attackers}".format,
+        "not_attacked": "{square} none".format,
+        "status": "{color} <> {legal_moves} moves".format,
+        "in_check": " <> check".format,
+        "repeated": " <> repeated {repetitions}".format,
+        "fifty_moves": " <> fifty moves".format,
+    },
+}
+
 
 class LeftWidget(QWidget):
     """
@@ -62,6 +124,7 @@ class LeftWidget(QWidget):
         )
 
         web_page = QWebEnginePage(self.profile, self.chessWebView)
+        installBridge(web_page)
         self.chessWebView.setPage(web_page)
         self.chessWebView.load(QUrl("https://www.chess.com"))
 
@@ -80,25 +143,11 @@ class LeftWidget(QWidget):
         def callback(x):
             self.userLoginName = x
 
-        jsCode = """
-            function checkLogin() {{
-                return document.querySelector(".home-user-info")?.outerText
-            }}
-            checkLogin();
-            """
-        self.chessWebView.page().runJavaScript(jsCode, callback)
+        runBridge(self.chessWebView.page(), "checkLogin", callback=callback)
 
     # crawl remaining time
     def checkTime(self, callBack):
-        jsCode = """
-            function checkTime() {{
-                clocks = document.querySelectorAll(".clock-time-monospace")
-                return [clocks[0].outerText, clocks[1].outerText]
-            }}
-            checkTime();
-            """
-
-        return self.chessWebView.page().runJavaScript(jsCode, callBack)
+        return runBridge(self.chessWebView.page(), "checkTime", callback=callBack)
 
 
 class CheckBox(QCheckBox):
@@ -149,8 +198,30 @@ class RightWidget(QWidget):
         self.playWithOtherButton.setAccessibleDescription(
             "press enter to play with other online player"
         )
+        self.playBlitzButton = QPushButton("Play blitz online (3 min)")
+        self.playBlitzButton.setAccessibleName("Play blitz online")
+        self.playBlitzButton.setAccessibleDescription(
+            "press enter to play a 3 minutes game with fast announcements and no move confirmation"
+        )
+
+        self.playBulletButton = QPushButton("Play bullet online (1 min)")
+        self.playBulletButton.setAccessibleName("Play bullet online")
+        self.playBulletButton.setAccessibleDescription(
+            "press enter to play a 1 minute game with fast announcements and no move confirmation"
+        )
         self.playWithComputerButton.setAutoDefault(True)
         self.playWithOtherButton.setAutoDefault(True)
+        self.playBlitzButton.setAutoDefault(True)
+        self.playBulletButton.setAutoDefault(True)
+
+        self.page_events_checkBox = CheckBox("Move pieces without the mouse cursor")
+        self.page_events_checkBox.setChecked(True)
+        self.page_events_checkBox.setAccessibleName(
+            "Move pieces without the mouse cursor"
+        )
+        self.page_events_checkBox.setAccessibleDescription(
+            "untick to move pieces with the system mouse cursor in the next game"
+        )
 
         self.colorBox = QLabel()
         self.colorBox.setText("Assigned Color: ")
@@ -185,6 +256,9 @@ class RightWidget(QWidget):
         self.setting_menu = []
         self.setting_menu.append(self.playWithComputerButton)
         self.setting_menu.append(self.playWithOtherButton)
+        self.setting_menu.append(self.playBlitzButton)
+        self.setting_menu.append(self.playBulletButton)
+        self.setting_menu.append(self.page_events_checkBox)
 
         self.play_menu = []
         self.play_menu.append(self.colorBox)
@@ -262,9 +336,8 @@ class MainWindow(QMainWindow):
         print("change status", status)
         match status:
             case Bot_flow_status.setting_status:
-                self.getOpponentMoveTimer.stop()
-                self.check_game_end_timer.stop()
-                self.getScoreTimer.stop()
+                self.stop_game_polling()
+                self.pollScheduler.disable("score")
                 self.main_flow_status = Bot_flow_status.setting_status
                 self.input_mode = Input_mode.command_mode
                 self.rightWidget.commandPanel.setAccessibleDescription(
@@ -296,9 +369,8 @@ class MainWindow(QMainWindow):
                     partial(print, "connect")
                 )
                 self.leftWidget.chessWebView.loadFinished.disconnect()
-                self.getOpponentMoveTimer.stop()
-                self.check_game_end_timer.stop()
-                self.getScoreTimer.stop()
+                self.stop_game_polling()
+                self.pollScheduler.disable("score")
                 self.input_mode = Input_mode.command_mode
                 for w in self.rightWidget.setting_menu:
                     w.hide()
@@ -308,9 +380,13 @@ class MainWindow(QMainWindow):
                 self.userColor = None
                 self.opponentColor = None
                 self.leftWidget.grids = dict()
+                self.select_move_executor()
                 return
             case Bot_flow_status.game_play_status:
-                self.check_game_end_timer.start(2000)
+                self.pollScheduler.enable("moves")
+                self.pollScheduler.enable("position")
+                if self.game_play_mode == Game_play_mode.online_mode:
+                    self.clockTimer.start()
                 self.rightWidget.commandPanel.setFocus()
                 self.currentFoucs = len(self.rightWidget.play_menu)
                 self.main_flow_status = Bot_flow_status.game_play_status
@@ -330,6 +406,7 @@ class MainWindow(QMainWindow):
         print("computer mode selected")
         self.change_main_flow_status(Bot_flow_status.board_init_status)
         self.game_play_mode = Game_play_mode.computer_mode
+        self.apply_profile(Time_control.classical)
         speak(
             "computer engine mode <>" + Speak_template.initialize_game_sentense.value,
             True,
@@ -348,9 +425,7 @@ class MainWindow(QMainWindow):
                 partial(
                     self.clickWebButton,
                     [("button", "start"), ("button", "choose"), ("button", "play")],
-                    0,
                     clickNCapture,
-                    0,
                 )
             )
         else:
@@ -358,14 +433,12 @@ class MainWindow(QMainWindow):
                 partial(
                     self.clickWebButton,
                     [("button", "start"), ("button", "choose"), ("button", "play")],
-                    0,
                     clickNCapture,
-                    0,
                 )
             )
 
     ##initialize a vs online player game for user
-    def playWithOtherButtonHandler(self):  ###url
+    def playWithOtherButtonHandler(self, *, timeControl=Time_control.classical):  ###url
         if self.main_flow_status == Bot_flow_status.board_init_status:
             speak("Still " + Speak_template.initialize_game_sentense.value, True)
             return
@@ -375,11 +448,15 @@ class MainWindow(QMainWindow):
         ):
             speak("Please resign before start a new game", True)
             return
-        print("online mode selected")
+        print("online mode selected", timeControl.value)
         self.change_main_flow_status(Bot_flow_status.board_init_status)
         self.game_play_mode = Game_play_mode.online_mode
+        self.apply_profile(timeControl)
         speak(
-            "online player mode <>" + Speak_template.initialize_game_sentense.value,
+            "online player mode <>"
+            + timeControl.value
+            + " <>"
+            + Speak_template.initialize_game_sentense.value,
             True,
         )
         self.leftWidget.chessWebView.load(QUrl("https://www.chess.com/play/online"))
@@ -407,12 +484,10 @@ class MainWindow(QMainWindow):
                     [
                         ("button", "min"),
                         ("button", "More Time Controls"),
-                        ("button", "30 min"),
+                        ("button", timeControl.value, True),
                         ("button", "play"),
                     ],
-                    0,
                     clickNCapture,
-                    0,
                 )
             )
         else:
@@ -422,129 +497,91 @@ class MainWindow(QMainWindow):
                     self.clickWebButton,
                     [
                         ("button", "min"),
-                        ("button", "30 min"),
+                        ("button", timeControl.value, True),
                         ("button", "play"),
                         ("a", "play as a guest"),
                     ],
-                    0,
                     clickNCapture,
-                    0,
                 )
             )
 
-    ##convert move to human readable form
-    def move_to_human_form(self, attackerColor, uciString, sanString):
-        counter_color = "WHITE" if attackerColor == "BLACK" else "BLACK"
-        human_string = attackerColor
-        uciString = str(uciString).lower()
-        sanString = str(sanString).lower()
-        target_square = uciString[:2]
-        dest_square = uciString[2:4]
-
-        self.chessBoard.board_object.pop()
-
-        en_passant = self.chessBoard.board_object.has_legal_en_passant()
-        target_piece_type = self.chessBoard.check_grid(target_square).__str__().lower()
-
-        dest_piece_type = self.chessBoard.check_grid(dest_square).__str__().lower()
-
-        print(target_piece_type, dest_piece_type)
-        # self.chessBoard.moveWithValidate(sanString)
-        if sanString.count("x"):
-            human_string = (
-                human_string
-                + " "
-                + PIECE_TYPE_CONVERSION[target_piece_type]
-                + " captures"
+    ##use the game profile of the time control, fast ones skip confirmation and poll tighter
+    def apply_profile(self, timeControl):
+        self.profile = PROFILES[timeControl]
+        self.latencyBudget = LatencyBudget(self.profile.latency_budget)
+        self.low_time_warned = False
+        if not self.verbosity_chosen:
+            self.verbosity = (
+                Verbosity.brief if self.profile.terse_moves else Verbosity.full
             )
-            if en_passant and target_piece_type == "p" and dest_piece_type == None:
-                human_string = (
-                    human_string + " on " + dest_square.upper() + " en passant"
-                )
-            else:
-                human_string = (
-                    human_string
-                    + " "
-                    + counter_color
-                    + " "
-                    + PIECE_TYPE_CONVERSION[dest_piece_type]
-                    + " on "
-                    + dest_square.upper()
-                )
-        else:
-            human_string = (
-                human_string
-                + " "
-                + PIECE_TYPE_CONVERSION[target_piece_type]
-                + " moves to "
-                + dest_square
-            )
-
-        if sanString.count("O-O-O"):
-            human_string = human_string + " queenside castling"
-        elif sanString.count("O-O"):
-            human_string = human_string + " kingside castling"
-        elif sanString.count("="):
-            human_string = (
-                human_string
-                + " and promoted to "
-                + PIECE_TYPE_CONVERSION[
-                    sanString[sanString.index("=") + 1].__str__().lower()
-                ]
-            )
-
-        if sanString.count("+"):
-            human_string = human_string + " and check "
-        self.chessBoard.moveWithValidate(sanString)
+        self.pollScheduler.set_intervals(
+            self.profile.fast_interval, self.profile.slow_interval
+        )
+        print("game profile", timeControl.value)
+
+    ##ask the user to confirm a move, fast profiles play it right away
+    def confirm_move(self, human_string):
+        if self.profile.confirm_move:
+            return confirmDialog(human_string).exec()
+        return True
+
+    ##"verbosity full", "verbosity brief" or "verbosity terse", "verbosity" alone switches to the next level
+    def set_verbosity(self, input):
+        levels = list(Verbosity)
+        chosen = levels[(levels.index(self.verbosity) + 1) % len(levels)]
+        for level in levels:
+            if input.count(level.name):
+                chosen = level
+        self.verbosity = chosen
+        self.verbosity_chosen = True
+        speak("verbosity " + chosen.name, True, category=Speech_category.query)
+
+    ##sentence of the move just pushed on the mirror, in the current verbosity
+    def describe_move(self):
+        human_string = self.chessBoard.describe_last_move(self.verbosity)
         print(human_string)
         return human_string
 
-    ##check the score when end game
-    def check_score(self):
-
-        def callBack(x):
-            if (
-                not self.game_flow_status == Game_flow_status.game_end
-                or not self.game_play_mode == Game_play_mode.online_mode
-            ):
-                self.getScoreTimer.stop()
-                return
-            if not x == None and (x[0] or x[1]):
-                speak_string = ""
-                print("rating: ", x[0], "league: ", x[1])
-                if not x[0] == None:
-                    speak_string = speak_string + "rating " + x[0]
-                if not x[1] == None:
-                    speak_string = speak_string + "league " + x[1]
-                self.getScoreTimer.stop()
-                speak(speak_string)
-            else:
-                self.getScoreTimer.start(1000)
-
-        jsCode = """
-            function checkScore(){{
-                rating = document.querySelectorAll(".rating-score-component")[1]
-                league = document.querySelectorAll(".league-score-component")[0]
-
-                if(!rating.textContent){{
-                    rating = null 
-                }}
-                else{{
-                    rating = rating.textContent?.trim()
-                }}
-
-                if(!league.textContent){{
-                    league = null 
-                }}
-                else{{
-                    league = rating.textContent?.trim()
-                }}
-                return [rating, league]
-            }}
-
-            checkScore();
-        """
-        return self.leftWidget.chessWebView.page().runJavaScript(jsCode, callBack)
+    ##cue of the opponent's move, only the most critical event is played
+    def move_earcon(self, san_string):
+        if self.chessBoard.board_object.is_check():
+            return Earcon.check
+        if san_string.count("X"):
+            return Earcon.capture
+        return Earcon.your_turn
+
+    ##cue once when the user's clock runs low, polled every second by the clock timer
+    def on_clock_polled(self, clocks):
+        if clocks == None:
+            return
+        seconds = clockSeconds(clocks[1])
+        if seconds == None:
+            return
+        if seconds > self.profile.low_time:
+            self.low_time_warned = False
+        elif not self.low_time_warned:
+            self.low_time_warned = True
+            self.earconPlayer.play(Earcon.low_time)
+
+    ##check the score when end game, polled by the scheduler
+    def on_score_polled(self, x):
+        if (
+            not self.game_flow_status == Game_flow_status.game_end
+            or not self.game_play_mode == Game_play_mode.online_mode
+        ):
+            self.pollScheduler.disable("score")
+            return False
+        if not x == None and (x[0] or x[1]):
+            speak_string = ""
+            print("rating: ", x[0], "league: ", x[1])
+            if not x[0] == None:
+                speak_string = speak_string + "rating " + x[0]
+            if not x[1] == None:
+                speak_string = speak_string + "league " + x[1]
+            self.pollScheduler.disable("score")
+            speak(speak_string)
+            return True
+        return False
 
     ##click resign button on web view
     def resign_handler(self):
@@ -555,8 +592,7 @@ class MainWindow(QMainWindow):
             def callBack():
                 self.game_flow_status = Game_flow_status.game_end
                 speak(Speak_template.user_resign.value)
-                self.getOpponentMoveTimer.stop()
-                self.getScoreTimer.start(1000)
+                self.pollScheduler.enable("score")
                 return
 
             if (
@@ -569,9 +605,8 @@ class MainWindow(QMainWindow):
                         ("button", "resign"),
                         ("button", "yes", True),
                     ],
-                    0,
                     callBack,
-                    0,
+                    timeout=WebAutomation.OPTIONAL_STEP_TIMEOUT,
                 )
             else:
                 self.clickWebButton(
@@ -580,17 +615,102 @@ class MainWindow(QMainWindow):
                         ("button", "resign"),
                         ("button", "yes", True),
                     ],
-                    0,
                     callBack,
-                    0,
+                    timeout=WebAutomation.OPTIONAL_STEP_TIMEOUT,
                 )
         else:
             speak("Cancel!")
 
+    ##batch board queries: "white pieces" / "black pieces", "attackers e4" and "status"
+    def board_query_sentence(self, input):
+        templates = QUERY_TEMPLATES[self.verbosity]
+        if input.count("status"):
+            facts = self.chessBoard.position_facts()
+            history = self.chessBoard.history_facts()
+            turn = "WHITE" if self.chessBoard.board_object.turn else "BLACK"
+            sentence = templates["status"](color=turn, legal_moves=facts["legal_moves"])
+            if facts["check"]:
+                sentence = sentence + templates["in_check"]()
+            if history["repetitions"] > 1:
+                sentence = sentence + templates["repeated"](
+                    repetitions=history["repetitions"]
+                )
+            if history["fifty_moves"]:
+                sentence = sentence + templates["fifty_moves"]()
+            return sentence
+        if input.count("pieces"):
+            color = "BLACK" if input.count("black") else "WHITE"
+            if input.count("my"):
+                color = self.userColor
+            elif input.count("opponent"):
+                color = self.opponentColor
+            groups = [
+                self.squares_phrase(templates["group"], piece_type, squares)
+                for piece_type, squares in self.chessBoard.check_color(color)
+            ]
+            return templates["pieces"](color=color, groups=" <> ".join(groups))
+        if input.count("attack"):
+            grid = input.replace("attackers", "").replace("attack", "").replace(" ", "")
+            attackers = self.chessBoard.check_attackers(grid)
+            if attackers == "Invalid square name":
+                return attackers
+            groups = []
+            for color, found in attackers.items():
+                for piece_type, square in found:
+                    groups.append(
+                        templates["attacker"](
+                            color=color,
+                            piece=piece_type,
+                            square=square,
+                            SQUARE=square.upper(),
+                        )
+                    )
+            if len(groups) == 0:
+                return templates["not_attacked"](square=grid, SQUARE=grid.upper())
+            return templates["attacked"](
+                square=grid, SQUARE=grid.upper(), attackers=" <> ".join(groups)
+            )
+        return None
+
+    ##fill a template with a piece type and its squares, e.g. "8 pawns a2 b2 c2"
+    def squares_phrase(self, template, piece_type, squares, color=None):
+        return template(
+            count=len(squares),
+            color=color,
+            name=piece_type,
+            names=piece_type if len(squares) == 1 else piece_type + "s",
+            squares=" ".join(squares),
+            SQUARES=" ".join(squares).upper(),
+        )
+
+    ##where are the pieces of a type, e.g. "knight" -> "2 WHITE knights B1 G1 and 2 BLACK knights B8 G8"
+    def piece_location_sentence(self, piece_type):
+        templates = QUERY_TEMPLATES[self.verbosity]
+        try:
+            piece_type = PIECE_TYPE_CONVERSION[piece_type]
+        except Exception as e:
+            print(e)
+        grid = self.chessBoard.check_piece(piece_type)
+        sentences = []
+        for color in ["WHITE", "BLACK"]:
+            if len(grid[color]) > 0:
+                template = templates["located"]
+            else:
+                template = templates["not_found"]
+            sentences.append(
+                self.squares_phrase(template, piece_type, grid[color], color)
+            )
+        return " and ".join(sentences)
+
     ##handle check position query, user input square name or piece type to check the location
     def check_position_handler(self):
         input = self.rightWidget.check_position.text().lower()
         print(any(char.isdigit() for char in input))
+        query_sentence = self.board_query_sentence(input)
+        if not query_sentence == None:
+            speak(query_sentence, category=Speech_category.query)
+            self.rightWidget.check_position.clear()
+            return
         if any(char.isdigit() for char in input):
             grid = input
             piece = self.chessBoard.check_grid(grid).__str__()
@@ -604,59 +724,22 @@ class MainWindow(QMainWindow):
                     else:
                         speak_sentence = speak_sentence + " WHITE "
                     speak(
-                        speak_sentence + PIECE_TYPE_CONVERSION[piece.__str__().lower()]
+                        speak_sentence + PIECE_TYPE_CONVERSION[piece.__str__().lower()],
+                        category=Speech_category.query,
                     )
                 else:
-                    speak(speak_sentence + " empty")
+                    speak(speak_sentence + " empty", category=Speech_category.query)
             else:
-                speak(speak_sentence)
+                speak(speak_sentence, category=Speech_category.query)
             self.rightWidget.check_position.clear()
             return
         else:
-            piece_type = input
-            try:
-                piece_type = PIECE_TYPE_CONVERSION[piece_type]
-            except Exception as e:
-                print(e)
-            grid = self.chessBoard.check_piece(piece_type)
-            speak_string = ""
-            white = grid["WHITE"]
-            if len(white) > 0:
-                speak_string = (
-                    speak_string
-                    + len(white).__str__()
-                    + " WHITE "
-                    + piece_type
-                    + white.__str__().upper()
-                )
-            else:
-                speak_string = speak_string + "NO WHITE " + piece_type + "found "
-
-            speak_string = speak_string + " and "
-            black = grid["BLACK"]
-            if len(white) > 0:
-                speak_string = (
-                    speak_string
-                    + len(black).__str__()
-                    + " BLACK "
-                    + piece_type
-                    + black.__str__().upper()
-                )
-            else:
-                speak_string = speak_string + "NO BLACK " + piece_type + "found "
-            speak(speak_string)
+            speak(self.piece_location_sentence(input), category=Speech_category.query)
             self.rightWidget.check_position.clear()
             return
 
     ## interpret the input command and perform different task accordingly
     def CommandPanelHandler(self):
-        def focus_back():
-            if self.input_mode == Input_mode.arrow_mode:
-                self.leftWidget.grids[self.currentFoucs].setFocus()
-            else:
-                self.rightWidget.commandPanel.setFocus()
-            return
-
         input = self.rightWidget.commandPanel.text().lower()
 
         if input.count("computer") or input == "c":
@@ -667,6 +750,18 @@ class MainWindow(QMainWindow):
             self.playWithOtherButtonHandler()
             self.rightWidget.commandPanel.clear()
             return
+        elif input.count("verbosity"):
+            self.set_verbosity(input)
+            self.rightWidget.commandPanel.clear()
+            return
+        elif input.count("blitz") or input.count("bullet"):
+            self.playWithOtherButtonHandler(
+                timeControl=(
+                    Time_control.blitz if input.count("blitz") else Time_control.bullet
+                )
+            )
+            self.rightWidget.commandPanel.clear()
+            return
         match self.main_flow_status:
             # case Bot_flow_status.setting_status:
             #     if input == "computer":
@@ -681,7 +776,10 @@ class MainWindow(QMainWindow):
                 return
             case Bot_flow_status.game_play_status:
                 if input.count("color"):
-                    speak("You are playing as {}".format(self.userColor))
+                    speak(
+                        "You are playing as {}".format(self.userColor),
+                        category=Speech_category.query,
+                    )
                     return
                 if input.count("time") or input == "t":
                     if self.game_play_mode == Game_play_mode.online_mode:
@@ -706,54 +804,34 @@ class MainWindow(QMainWindow):
                                 speak(
                                     Speak_template.check_time_sentense.value.format(
                                         user, opponent
-                                    )
+                                    ),
+                                    category=Speech_category.query,
                                 )
 
                         self.leftWidget.checkTime(timeCallback)
                         self.rightWidget.commandPanel.clear()
                         return
                     else:
-                        speak("No timer for computer mode")
+                        speak(
+                            "No timer for computer mode", category=Speech_category.query
+                        )
                         self.rightWidget.commandPanel.clear()
                         return
                 if input.count("resign"):
                     self.resign_handler()
                     self.rightWidget.commandPanel.clear()
                     return
+                query_sentence = self.board_query_sentence(input)
+                if not query_sentence == None:
+                    speak(query_sentence, category=Speech_category.query)
+                    self.rightWidget.commandPanel.clear()
+                    return
                 if input.count("where"):
                     piece_type = input.replace("where", "").replace(" ", "")
-                    try:
-                        piece_type = PIECE_TYPE_CONVERSION[piece_type]
-                    except Exception as e:
-                        print(e)
-                    grid = self.chessBoard.check_piece(piece_type)
-                    speak_string = ""
-                    white = grid["WHITE"]
-                    if len(white) > 0:
-                        speak_string = (
-                            speak_string
-                            + len(white).__str__()
-                            + " WHITE "
-                            + piece_type
-                            + white.__str__().upper()
-                        )
-                    else:
-                        speak_string = speak_string + "NO WHITE " + piece_type
-
-                    speak_string = speak_string + " and "
-                    black = grid["BLACK"]
-                    if len(white) > 0:
-                        speak_string = (
-                            speak_string
-                            + len(black).__str__()
-                            + " BLACK "
-                            + piece_type
-                            + black.__str__().upper()
-                        )
-                    else:
-                        speak_string = speak_string + "NO BLACK " + piece_type
-                    # speak(piece_type + " " + grid.__str__())
-                    speak(speak_string)
+                    speak(
+                        self.piece_location_sentence(piece_type),
+                        category=Speech_category.query,
+                    )
                     self.rightWidget.commandPanel.clear()
                     return
                 elif input.count("what"):
@@ -770,12 +848,16 @@ class MainWindow(QMainWindow):
                                 speak_sentence = speak_sentence + " WHITE "
                             speak(
                                 speak_sentence
-                                + PIECE_TYPE_CONVERSION[piece.__str__().lower()]
+                                + PIECE_TYPE_CONVERSION[piece.__str__().lower()],
+                                category=Speech_category.query,
                             )
                         else:
-                            speak(speak_sentence + " empty")
+                            speak(
+                                speak_sentence + " empty",
+                                category=Speech_category.query,
+                            )
                     else:
-                        speak(speak_sentence)
+                        speak(speak_sentence, category=Speech_category.query)
                     self.rightWidget.commandPanel.clear()
                     return
                 if self.game_flow_status == Game_flow_status.user_turn:
@@ -789,9 +871,7 @@ class MainWindow(QMainWindow):
                     if len(movePair) == 2:
                         uci_string = movePair[0]
                         san_string = movePair[1]
-                        human_string = self.move_to_human_form(
-                            self.userColor, uci_string, san_string
-                        )
+                        human_string = self.describe_move()
 
                         # movePair = movePair[0]
 
@@ -804,26 +884,10 @@ class MainWindow(QMainWindow):
                         promote_index = list(PIECE_TYPE_CONVERSION).index(promoteTo)
 
                         # dlg = confirmMoveDialog("pawn", dest, promote=promoteTo)
-                        dlg = confirmDialog(human_string)
-                        if dlg.exec():
-                            self.all_grids_switch(False)
-                            targetWidget = self.leftWidget.grids[target]
-                            destWidget = self.leftWidget.grids[dest]
-                            if widgetDragDrop(targetWidget, destWidget):
-                                match self.userColor:
-                                    case "BLACK":
-                                        place = str(dest[0]) + str(
-                                            int(dest[1]) + promote_index
-                                        )
-                                    case "WHITE":
-                                        place = str(dest[0]) + str(
-                                            int(dest[1]) - promote_index
-                                        )
-                                promoteWidget = self.leftWidget.grids[place]
-                                if widgetClick(promoteWidget):
-                                    self.rightWidget.commandPanel.clear()
-                                    QTimer.singleShot(1000, focus_back)
-                                    self.getOpponentMoveTimer.start(1000)
+                        if self.confirm_move(human_string):
+                            place = self.promote_square(dest, promote_index)
+                            self.rightWidget.commandPanel.clear()
+                            self.execute_user_move(target, dest, place)
                         else:
                             self.chessBoard.board_object.pop()
                             self.rightWidget.commandPanel.clear()
@@ -837,18 +901,9 @@ class MainWindow(QMainWindow):
                             self.chessBoard.check_grid(dest).__str__().lower()
                         )
                         # dlg = confirmMoveDialog(target_type, dest)
-                        dlg = confirmDialog(human_string)
-                        if dlg.exec():
-                            self.all_grids_switch(False)
-                            # QTimer.singleShot(3000, partial(self.clickStart,input))
-                            # print(self.chessBoard.board_object)
-
-                            targetWidget = self.leftWidget.grids[target]
-                            destWidget = self.leftWidget.grids[dest]
+                        if self.confirm_move(human_string):
                             self.rightWidget.commandPanel.clear()
-                            if widgetDragDrop(targetWidget, destWidget):
-                                QTimer.singleShot(1000, focus_back)
-                                self.getOpponentMoveTimer.start(1000)
+                            self.execute_user_move(target, dest)
                         else:
                             self.chessBoard.board_object.pop()
                             self.rightWidget.commandPanel.clear()
@@ -860,12 +915,165 @@ class MainWindow(QMainWindow):
                         )
                         self.rightWidget.commandPanel.setFocus()
                     else:
-                        speak(input + movePair)
+                        self.earconPlayer.play(Earcon.illegal)
+                        speak(input + movePair, category=Speech_category.alert)
                         print(input + movePair)  ##error move speak
                         self.rightWidget.commandPanel.clear()
+                elif self.game_flow_status == Game_flow_status.opponent_turn:
+                    self.rightWidget.commandPanel.clear()
+                    if input.count("cancel"):
+                        self.premoves = []
+                        speak("Premoves cancelled")
+                        return
+                    self.premoves.append(input)
+                    speak("Premove {0} queued <> {1}".format(len(self.premoves), input))
                 else:
                     speak("Please wait for your opponent's move")
 
+    ##grid of the piece in the promotion picker, the picker opens over the promotion square
+    def promote_square(self, dest, promote_index):
+        match self.userColor:
+            case "BLACK":
+                return str(dest[0]) + str(int(dest[1]) + promote_index)
+            case "WHITE":
+                return str(dest[0]) + str(int(dest[1]) - promote_index)
+
+    ##play the next premove on the position after the opponent's reply, without confirmation
+    def play_premove(self):
+        if (
+            len(self.premoves) == 0
+            or self.chessBoard == None
+            or not self.game_flow_status == Game_flow_status.user_turn
+        ):
+            return False
+        input = self.premoves.pop(0)
+        movePair = self.chessBoard.moveWithValidate(input)
+        if not len(movePair) == 2:
+            ## later premoves were planned on this one, drop them too
+            self.premoves = []
+            if movePair == "Promotion":
+                movePair = "needs a promotion piece"
+            self.earconPlayer.play(Earcon.illegal)
+            speak(
+                "Premove {0} {1} <> premoves cleared".format(input, movePair),
+                True,
+                category=Speech_category.alert,
+            )
+            return False
+
+        uci_string = movePair[0]
+        san_string = movePair[1]
+        speak("Premove " + self.describe_move())
+        place = None
+        if len(uci_string) == 5:
+            promoteTo = san_string[san_string.index("=") + 1].__str__().lower()
+            place = self.promote_square(
+                uci_string[2:4], list(PIECE_TYPE_CONVERSION).index(promoteTo)
+            )
+        self.execute_user_move(uci_string[:2], uci_string[2:4], place)
+        return True
+
+    ##hand the confirmed move to the move executor, the grids are hidden while it clicks
+    def execute_user_move(self, target, dest, promote=None):
+        ## measured from here, the time spent in the confirm dialog is the user's
+        self.latencyBudget.start("user move")
+        self.all_grids_switch(False)
+        self.game_flow_status = Game_flow_status.opponent_turn
+        self.pending_move = {
+            "squares": (target, dest, promote),
+            "ply": len(self.chessBoard.board_object.move_stack),
+            "san": self.chessBoard.last_san(),
+            "attempt": 0,
+        }
+        self.inject_user_move()
+
+    def inject_user_move(self):
+        target, dest, promote = self.pending_move["squares"]
+        promoteWidget = None if promote == None else self.leftWidget.grids[promote]
+        started = self.moveExecutor.execute(
+            self.leftWidget.grids[target], self.leftWidget.grids[dest], promoteWidget
+        )
+        ## e.g. a premove while the previous move still waits for its square, played when it finishes
+        self.pending_move["deferred"] = started == False
+        if not self.pending_move["deferred"]:
+            self.pending_move["attempt"] += 1
+            self.pending_move["injected_at"] = time.monotonic()
+
+    ##pick the move backend for this game from the setting menu
+    def select_move_executor(self):
+        if self.rightWidget.page_events_checkBox.isChecked():
+            self.moveExecutor = self.pageMoveExecutor
+        else:
+            self.moveExecutor = self.cursorMoveExecutor
+        print("move backend", self.moveExecutor.backend.value)
+
+    ##move executor finished clicking, check the move list before waiting for the opponent
+    def on_move_executed(self, landed):
+        print("move executed, piece left its square:", landed)
+        if self.pending_move == None:
+            return
+        ## the run that finished belongs to the previous move, the deferred one starts now
+        if self.pending_move["deferred"]:
+            self.inject_user_move()
+            return
+        self.moveVerifier.verify(
+            self.pending_move["ply"],
+            self.pending_move["san"],
+            self.pending_move["injected_at"],
+            partial(self.on_move_verified, self.pending_move),
+        )
+
+    ##retry a move that never reached the move list, roll the mirror back after the last attempt
+    def on_move_verified(self, pending, confirmed):
+        ## a premove played after the opponent's reply replaced this move
+        if not pending is self.pending_move:
+            return
+        if (
+            pending == None
+            or self.chessBoard == None
+            or not self.main_flow_status == Bot_flow_status.game_play_status
+        ):
+            self.pending_move = None
+            return
+        board = self.chessBoard.board_object
+        if confirmed:
+            self.pending_move = None
+            self.latencyBudget.stop("user move")
+            self.focus_back()
+            ## the opponent's reply may already be synced by the move channel
+            if len(board.move_stack) == pending["ply"]:
+                self.wait_opponent_move()
+            return
+        if not len(board.move_stack) == pending["ply"]:
+            ## the mirror moved on, the reconciler owns the position now
+            self.pending_move = None
+            return
+        if pending["attempt"] < MoveVerifier.MAX_ATTEMPTS:
+            print("move not in move list, retry", pending["attempt"])
+            self.moveVerifier.record_retry()
+            self.inject_user_move()
+            return
+
+        self.moveVerifier.record_failure()
+        self.pending_move = None
+        board.pop()
+        self.game_flow_status = Game_flow_status.user_turn
+        if self.input_mode == Input_mode.arrow_mode:
+            self.all_grids_switch(True)
+        self.focus_back()
+        sentence = "Move " + pending["san"] + " was not played, please try again"
+        ## premoves were planned on top of the rolled back move
+        if len(self.premoves) > 0:
+            self.premoves = []
+            sentence = sentence + " <> premoves cleared"
+        speak(sentence, True, category=Speech_category.alert)
+
+    def focus_back(self):
+        if self.input_mode == Input_mode.arrow_mode:
+            self.leftWidget.grids[self.currentFoucs].setFocus()
+        else:
+            self.rightWidget.commandPanel.setFocus()
+
     ##check game end, sync with mirrored chess board and announce opponent's move
     def announceMove(self, sanString):
         print("broadcast move: ", sanString)
@@ -875,11 +1083,10 @@ class MainWindow(QMainWindow):
         check_win = self.chessBoard.detect_win()
         if not check_win == "No win detected.":  ##check user wins
             print(check_win)
-            speak(check_win)
+            speak(check_win, category=Speech_category.alert)
             self.game_flow_status = Game_flow_status.game_end
             self.change_main_flow_status(Bot_flow_status.setting_status)
-            self.getOpponentMoveTimer.stop()
-            self.getScoreTimer.start(1000)
+            self.pollScheduler.enable("score")
             return True
 
         match self.opponentColor:
@@ -892,9 +1099,8 @@ class MainWindow(QMainWindow):
                         if not crawl_result == None:
                             self.game_flow_status = Game_flow_status.game_end
                             self.change_main_flow_status(Bot_flow_status.setting_status)
-                            self.getOpponentMoveTimer.stop()
-                            self.getScoreTimer.start(1000)
-                            speak(crawl_result, True)
+                            self.pollScheduler.enable("score")
+                            speak(crawl_result, True, category=Speech_category.alert)
                             return True
                         else:
                             return False
@@ -903,33 +1109,33 @@ class MainWindow(QMainWindow):
 
                     print(self.chessBoard.board_object)
                     if len(uci_string) <= 5:
-                        human_string = self.move_to_human_form(
-                            self.opponentColor, uci_string, san_string
-                        )
+                        human_string = self.describe_move()
 
                         check_win = self.chessBoard.detect_win()
                         print(check_win)
                         print(crawl_result)
+                        self.earconPlayer.play(self.move_earcon(san_string))
                         speak(
                             human_string,
                             importance=True,
+                            category=Speech_category.opponent_move,
                         )
+                        self.latencyBudget.stop("opponent move")
                         self.rightWidget.opponentBox.setText(
                             "Opponent move: \n" + human_string
                         )
                         self.game_flow_status = Game_flow_status.user_turn
+                        QTimer.singleShot(0, self.play_premove)
                         if not check_win == "No win detected.":
-                            speak(check_win, True)
+                            speak(check_win, True, category=Speech_category.alert)
                             self.game_flow_status = Game_flow_status.game_end
                             self.change_main_flow_status(Bot_flow_status.setting_status)
-                            self.getOpponentMoveTimer.stop()
-                            self.getScoreTimer.start(1000)
+                            self.pollScheduler.enable("score")
                         if not crawl_result == None:
                             self.game_flow_status = Game_flow_status.game_end
                             self.change_main_flow_status(Bot_flow_status.setting_status)
-                            self.getOpponentMoveTimer.stop()
-                            self.getScoreTimer.start(1000)
-                            speak(crawl_result, True)
+                            self.pollScheduler.enable("score")
+                            speak(crawl_result, True, category=Speech_category.alert)
                         return True
             case "BLACK":
                 if sanString and sanString[1] != None:
@@ -939,9 +1145,8 @@ class MainWindow(QMainWindow):
                         if not crawl_result == None:
                             self.game_flow_status = Game_flow_status.game_end
                             self.change_main_flow_status(Bot_flow_status.setting_status)
-                            self.getOpponentMoveTimer.stop()
-                            self.getScoreTimer.start(1000)
-                            speak(crawl_result, True)
+                            self.pollScheduler.enable("score")
+                            speak(crawl_result, True, category=Speech_category.alert)
                             return True
                         else:
                             return False
@@ -950,217 +1155,239 @@ class MainWindow(QMainWindow):
 
                     print(self.chessBoard.board_object)
                     if len(uci_string) <= 5:
-                        human_string = self.move_to_human_form(
-                            self.opponentColor, uci_string, san_string
-                        )
+                        human_string = self.describe_move()
                         # piece = self.chessBoard.check_grid(dest).__str__()
                         check_win = self.chessBoard.detect_win()
+                        self.earconPlayer.play(self.move_earcon(san_string))
                         print(check_win)
                         print(crawl_result)
                         speak(
                             human_string,
                             importance=True,
+                            category=Speech_category.opponent_move,
                         )
+                        self.latencyBudget.stop("opponent move")
                         self.rightWidget.opponentBox.setText(
                             "Opponent move: \n" + human_string
                         )
                         self.game_flow_status = Game_flow_status.user_turn
+                        QTimer.singleShot(0, self.play_premove)
                         if not check_win == "No win detected.":
-                            speak(check_win, True)
+                            speak(check_win, True, category=Speech_category.alert)
                             self.game_flow_status = Game_flow_status.game_end
                             self.change_main_flow_status(Bot_flow_status.setting_status)
-                            self.getOpponentMoveTimer.stop()
-                            self.getScoreTimer.start(1000)
+                            self.pollScheduler.enable("score")
                         elif not crawl_result == None:
                             self.game_flow_status = Game_flow_status.game_end
                             self.change_main_flow_status(Bot_flow_status.setting_status)
-                            self.getOpponentMoveTimer.stop()
-                            self.getScoreTimer.start(1000)
-                            speak(crawl_result, True)
+                            self.pollScheduler.enable("score")
+                            speak(crawl_result, True, category=Speech_category.alert)
                         return True
 
             case _:
                 return False
 
-    ##Check whether opponent resigned
-    def check_game_end(self):
-        def callback(x):
-            win_move = None
-            win_index = None
-            reason = None
-            if not x == None:
-                for index in range(len(x)):
-                    if not x[index] == None and x[index].count("#"):
-                        win_move = x[index]
-                    if not x[index] == None and x[index].count("1/2-1/2"):
-                        reason = "DRAW"
-                    if not x[index] == None and x[index].count("1-0"):
-                        reason = "WHITE wins"
-                    if not x[index] == None and x[index].count("0-1"):
-                        reason = "BLACK wins"
-                if not reason == None:
-                    if win_move == None:
-                        if reason == "BLACK wins":
-                            reason = "WHITE resigned"
-                        elif reason == "WHITE wins":
-                            reason = "BLACK resigned"
-                        self.game_flow_status = Game_flow_status.game_end
-                        self.change_main_flow_status(Bot_flow_status.setting_status)
-                        self.getScoreTimer.start(1000)
-                        self.getOpponentMoveTimer.stop()
-                        speak(reason)
-                    else:
-                        self.announceMove((win_move, win_move))
-
-        jsCode = """
-            function childImg(move){{
-                let sanString = '';
-                if(!move)
-                    return null
-                for (let i of move?.childNodes){{
-                    sanString+=i?.textContent || i?.getAttribute('data-figurine')
-                }}    
-                return sanString
-            }}
-            function getOpponentMove() {{
-                let moves = document.querySelectorAll('{0}');
-                let move = moves[moves.length-1]
-                if(move?.querySelector('[class*=result]')){{
-                    LastMove = moves[moves.length-1]
-                    if (moves.length != 1){{
-                        move = moves[moves.length-2]
-                    }}
-                    move = move.querySelectorAll('[class~=node]')
-                    return [LastMove?.querySelector('[class*=white]')?.outerText,LastMove?.querySelector('[class*=black]')?.outerText,childImg(move[0]),childImg(move[1])]
-                }}
-                move = move.querySelectorAll('[class~=node]')
-                return [childImg(move[0]),childImg(move[1])]
-            }}
-            getOpponentMove();
-            """.format(
-            ".move"
+    ##move nodes after the mirror's ply polled by the scheduler, announce them and check game end
+    def on_moves_polled(self, x):
+        if x == None or self.chessBoard == None:
+            return False
+        ply, sanList, result = x
+        if len(sanList) > 0:
+            self.latencyBudget.start("opponent move")
+        if len(sanList) > 0 and self.sync_moves(ply, sanList):
+            self.pollScheduler.relax()
+            self.verify_position()
+        if result == None or self.game_flow_status == Game_flow_status.game_end:
+            return len(sanList) > 0
+
+        check_win = self.chessBoard.detect_win()
+        if not check_win == "No win detected.":
+            reason = check_win
+        elif result.count("1/2-1/2"):
+            reason = "DRAW"
+        elif result.count("1-0"):
+            reason = "BLACK resigned"
+        elif result.count("0-1"):
+            reason = "WHITE resigned"
+        else:
+            return len(sanList) > 0
+        self.game_flow_status = Game_flow_status.game_end
+        self.change_main_flow_status(Bot_flow_status.setting_status)
+        self.pollScheduler.enable("score")
+        speak(reason, category=Speech_category.alert)
+        return True
+
+    ##mirror's ply count, the page returns every move node after it
+    def synced_ply(self):
+        if self.chessBoard == None:
+            return [0]
+        return [len(self.chessBoard.board_object.move_stack)]
+
+    ##stop every query that only makes sense during a game
+    def stop_game_polling(self):
+        self.pollScheduler.disable("moves")
+        self.pollScheduler.disable("position")
+        self.clockTimer.stop()
+        self.pollScheduler.relax()
+        self.pollScheduler.resume()
+        print("poll stats", self.pollScheduler.stats)
+        self.pending_move = None
+        self.premoves = []
+        self.moveVerifier.report()
+        print(
+            "latency budget", self.profile.time_control.value, self.latencyBudget.stats
         )
-        self.leftWidget.chessWebView.page().runJavaScript(jsCode, callback)
+        if not self.chessBoard == None:
+            print("position cache", self.chessBoard.cache_stats())
+        print("speech", speak_thread.report())
+
+    ##apply the move nodes after the last synced ply to the mirrored board in order
+    def sync_moves(self, ply, sanList):
+        announced = False
+        for sanString in sanList:
+            ply += 1
+            if self.chessBoard == None or sanString == None:
+                return announced
+            ## already synced, e.g. by the move channel while this query was in flight
+            if ply <= len(self.chessBoard.board_object.move_stack):
+                continue
+            moveColor = "WHITE" if ply % 2 == 1 else "BLACK"
+            if moveColor == self.opponentColor:
+                if moveColor == "WHITE":
+                    pushed = [sanString, None]
+                else:
+                    pushed = [None, sanString]
+                if not self.announceMove(pushed):
+                    return announced
+                announced = True
+                if self.game_flow_status == Game_flow_status.game_end:
+                    return announced
+            else:
+                ## user's own move that the mirror missed
+                movePair = self.chessBoard.moveWithValidate(sanString)
+                if not len(movePair) == 2:
+                    return announced
+        return announced
+
+    ##opponent move pushed by the web view MutationObserver through QWebChannel
+    def on_move_pushed(self, ply, sanString):
+        if (
+            self.chessBoard == None
+            or not self.main_flow_status == Bot_flow_status.game_play_status
+            or not ply == len(self.chessBoard.board_object.move_stack) + 1
+        ):
+            return
+        moveColor = "WHITE" if ply % 2 == 1 else "BLACK"
+        if not moveColor == self.opponentColor:
+            return
 
-    ##JS to get opponent move SAN
-    def getOpponentMove(self):
+        self.latencyBudget.start("opponent move")
+        if self.input_mode == Input_mode.arrow_mode:
+            self.all_grids_switch(True)
+        if self.sync_moves(ply - 1, [sanString]):
+            self.pollScheduler.relax()
+            self.verify_position()
+
+    ##move channel connected on the loaded page, keep polling as slow fallback only
+    def on_move_channel_ready(self):
+        print("move channel ready")
+        self.move_channel_ready = True
+
+    ##page reloaded, poll fast after moves until the move channel reconnect
+    def on_page_load_started(self):
+        self.move_channel_ready = False
+
+    ##user moved, wait for the opponent's move
+    def wait_opponent_move(self):
         if self.input_mode == Input_mode.arrow_mode:
             self.all_grids_switch(True)
 
         self.game_flow_status = Game_flow_status.opponent_turn
+        if not self.move_channel_ready:
+            self.pollScheduler.burst()
 
-        def callback(x):
-            if self.announceMove(x):
-                self.getOpponentMoveTimer.stop()
-            else:
-                self.getOpponentMoveTimer.start(1000)
-
-        jsCode = """
-            function childImg(move){{
-                let sanString = '';
-                if(!move)
-                    return null
-                for (let i of move?.childNodes){{
-                    sanString+=i?.textContent || i?.getAttribute('data-figurine')
-                }}    
-                return sanString
-            }}
-            function getOpponentMove() {{
-                let moves = document.querySelectorAll('{0}');
-                let move = moves[moves.length-1]
-                if(move?.querySelector('[class*=result]')){{
-                    LastMove = moves[moves.length-1]
-                    if (moves.length != 1){{
-                        move = moves[moves.length-2]
-                    }}
-                    move = move.querySelectorAll('[class~=node]')
-                    return [childImg(LastMove?.querySelector('[class*=white]')),childImg(LastMove?.querySelector('[class*=black]')),childImg(move[0]),childImg(move[1])]
-                }}
-                move = move.querySelectorAll('[class~=node]')
-                return [childImg(move[0]),childImg(move[1])]
-            }}
-            getOpponentMove();
-            """.format(
-            ".move"
-        )
-        self.leftWidget.chessWebView.page().runJavaScript(jsCode, callback)
+    ##pause page queries while the user is composing a move, the opponent can not move then
+    def on_command_text_changed(self, text):
+        if len(text) > 0 and self.game_flow_status == Game_flow_status.user_turn:
+            self.pollScheduler.pause()
+        else:
+            self.pollScheduler.resume()
 
-    ##JS to click on web view button
-    def clickWebButton(
-        self, displayTextList, index, finalCallback, retry
-    ):  ##avoid double load finish
-        if index >= len(displayTextList):
-            print("click finished")
-            # QTimer.singleShot(1000, finalCallback)
-            finalCallback()
-            # self.capture_screens
-            # hot()
-            return True
+    ##compare the web view position with the mirrored board
+    def verify_position(self):
+        def callback(snapshot):
+            if snapshot == None or self.chessBoard == None:
+                return
+            if not self.chessBoard.is_synced(snapshot["fen"]):
+                print(
+                    "position desync",
+                    snapshot["fen"],
+                    self.chessBoard.board_object.board_fen(),
+                )
 
-        def next_click(result):
-            if result == displayTextList[index][1].lower() or retry >= 6:
-                QTimer.singleShot(
-                    1000,
-                    partial(
-                        self.clickWebButton,
-                        displayTextList,
-                        index + 1,
-                        finalCallback,
-                        0,
-                    ),
+        self.positionReader.read(callback)
+
+    ##compare the polled move list fingerprint with the mirrored board and replay the missed moves
+    def reconcile_position(self, fingerprint):
+        if self.chessBoard == None or not self.game_flow_status in [
+            Game_flow_status.user_turn,
+            Game_flow_status.opponent_turn,
+        ]:
+            return False
+
+        def callback(missed):
+            human_strings = []
+            failed = None
+            for uciString in missed:
+                movePair = self.chessBoard.moveWithValidate(uciString)
+                if not len(movePair) == 2:
+                    failed = uciString
+                    break
+                human_strings.append(self.describe_move())
+            if len(human_strings) > 0:
+                speak(
+                    "missed moves <> " + " <> ".join(human_strings),
+                    True,
+                    category=Speech_category.alert,
                 )
-            else:
-                ## retry
-                add = retry + 1
-                QTimer.singleShot(
-                    500,
-                    partial(
-                        self.clickWebButton, displayTextList, index, finalCallback, add
+            if failed == None:
+                self.unreplayed_move = None
+            elif not failed == self.unreplayed_move:
+                ## the next fingerprint poll compares again from the replayed moves
+                self.unreplayed_move = failed
+                print("missed move not replayed:", failed, movePair)
+                speak(
+                    "missed move {0} could not be replayed <> the board may be out of sync".format(
+                        failed
                     ),
+                    True,
+                    category=Speech_category.alert,
                 )
 
-        # print(displayTextList[index][0], displayTextList[index][1].lower())
-        if len(displayTextList[index]) == 3:
-            jsCode = """
-            function out() {{
-                let buts = document.querySelectorAll('{0}');
-                for(but of buts){{
-                    if(but?.textContent?.trim()?.toLowerCase()=='{1}'||but?.innerText?.trim()?.toLowerCase() == '{1}'){{
-                        but.click();
-                        console.error(but?.textContent)
-                        console.error("**********************************")
-                        console.error('{1}')
-                        console.error("**********************************")
-                        return '{1}';
-                    }}
-                }}
-                return false;
-            }}
-            out();
-            """.format(
-                displayTextList[index][0], displayTextList[index][1].lower()
-            )
-        else:
-            jsCode = """
-                function out() {{
-                    let buts = document.querySelectorAll('{0}');
-                    for(but of buts){{
-                        if(but?.textContent?.trim()?.toLowerCase().includes('{1}')||but?.innerText?.trim()?.toLowerCase().includes('{1}')){{
-                            but.click();
-                            console.error(but?.textContent)
-                            console.error("**********************************")
-                            console.error('{1}')
-                            console.error("**********************************")
-                            return '{1}';
-                        }}
-                    }}
-                    return false;
-                }}
-                out();
-                """.format(
-                displayTextList[index][0], displayTextList[index][1].lower()
-            )
-        return self.leftWidget.chessWebView.page().runJavaScript(jsCode, next_click)
+            check_win = self.chessBoard.detect_win()
+            if not check_win == "No win detected.":
+                speak(check_win, True, category=Speech_category.alert)
+                self.game_flow_status = Game_flow_status.game_end
+                self.change_main_flow_status(Bot_flow_status.setting_status)
+                self.pollScheduler.enable("score")
+                return
+
+            turn = "WHITE" if self.chessBoard.board_object.turn else "BLACK"
+            if turn == self.userColor:
+                self.pollScheduler.relax()
+                self.game_flow_status = Game_flow_status.user_turn
+                self.play_premove()
+            else:
+                self.wait_opponent_move()
+
+        return self.positionReconciler.compare(self.chessBoard, callback, fingerprint)
+
+    ##click on web view buttons in order, each step waits for its button in page
+    def clickWebButton(
+        self, displayTextList, finalCallback, *, timeout=WebAutomation.STEP_TIMEOUT
+    ):
+        self.webAutomation.run(displayTextList, finalCallback, timeout)
+        return True
 
     ##assign square after detect the web view chessboard and color
     def getBoard(self):
@@ -1184,31 +1411,29 @@ class MainWindow(QMainWindow):
             else:
                 grid.hide()
 
-    ##computer vision to detect the chessboard
+    ##locate the chessboard, DOM measurement first and computer vision as fallback
     def capture_screenshot(self, retry=3):
         if retry <= 0:
             speak("board detection error, retry initialize", True)
             if self.game_play_mode == Game_play_mode.computer_mode:
                 self.playWithComputerHandler()
             else:
-                self.playWithOtherButtonHandler()
+                self.playWithOtherButtonHandler(timeControl=self.profile.time_control)
             return
 
-        try:
-            file_path = os.path.join(current_dir, "Tmp", "board_screenshot.png")
-            # file_path = "./widget_screenshot.png"
-            screenshot = self.leftWidget.chessWebView.grab()
-            screenshot.save(file_path)
-            print("cap here")
-            viewWidth = self.leftWidget.chessWebView.width()
-            viewHeight = self.leftWidget.chessWebView.height()
-            x, y, w, h = detectChessboard(file_path, viewWidth, viewHeight)
-        except Exception as e:
-            print("error retry", e)
+        self.boardLocator.locate(partial(self.assign_grids, retry))
+
+    ##build the invisible squares on the located board and detect the user's color
+    def assign_grids(self, retry, geometry, source):
+        if geometry == None:
+            print("error retry")
             retry = retry - 1
             QTimer.singleShot(2000, partial(self.capture_screenshot, retry))
             return
+        if not self.main_flow_status == Bot_flow_status.board_init_status:
+            return
 
+        x, y, w, h = geometry
         x = int(x)
         y = int(y)
         w = int((w / 8))
@@ -1227,15 +1452,21 @@ class MainWindow(QMainWindow):
                 label.show()
                 # label.hide()  # comment this to check whether the board detect success
 
-        user_rook_file = os.path.join(current_dir, "Tmp", "color_detection_user.png")
+        self.positionReader.read(self.assign_color)
 
-        user_rook = self.leftWidget.grids["77"]
-
-        self.leftWidget.chessWebView.grab(
-            QRect(user_rook.x(), user_rook.y(), w, h)
-        ).save(user_rook_file)
-
-        color = userColor(user_rook_file)
+    ##assign the user's color from the board orientation, pixel sampling as fallback
+    def assign_color(self, snapshot):
+        if not self.main_flow_status == Bot_flow_status.board_init_status:
+            return
+        if snapshot == None:
+            user_rook = self.leftWidget.grids["77"]
+            user_rook_image, user_rook_frame = qimageToArray(
+                self.leftWidget.chessWebView.grab(user_rook.geometry())
+            )
+            color = userColor(user_rook_frame)
+        else:
+            color = snapshot["color"]
+        print("user color", color, "from", "pixel" if snapshot == None else "DOM")
         self.userColor = color
         self.rightWidget.colorBox.setText("Assigned Color: " + color)
         if color == "BLACK":
@@ -1243,7 +1474,7 @@ class MainWindow(QMainWindow):
             self.alphabet.reverse()
             speak(Speak_template.user_black_side_sentense.value)
             self.game_flow_status = Game_flow_status.opponent_turn
-            self.getOpponentMoveTimer.start(1000)
+            self.wait_opponent_move()
         else:
             self.opponentColor = "BLACK"
             self.number.reverse()
@@ -1310,7 +1541,10 @@ class MainWindow(QMainWindow):
         # QLabel.setAccessibleName("Name")
         piece = self.chessBoard.check_grid(self.currentFoucs).__str__()
         if piece == "None":
-            speak("{0}".format(self.currentFoucs.upper()))
+            speak(
+                "{0}".format(self.currentFoucs.upper()),
+                category=Speech_category.navigation,
+            )
             return
         else:
             color = "white" if piece.isupper() else "black"
@@ -1320,7 +1554,7 @@ class MainWindow(QMainWindow):
                 PIECE_TYPE_CONVERSION.get(piece.lower()),
             )
             print(piece_square_text)
-            speak(piece_square_text)
+            speak(piece_square_text, category=Speech_category.navigation)
             self.leftWidget.grids[self.currentFoucs].setAccessibleDescription(
                 piece_square_text
             )
@@ -1370,7 +1604,7 @@ class MainWindow(QMainWindow):
             intro = unhidden_widgets[self.currentFoucs].text()
             if intro == "":
                 intro = unhidden_widgets[self.currentFoucs].accessibleDescription()
-            speak(intro)
+            speak(intro, category=Speech_category.navigation)
         else:
             self.leftWidget.grids[self.currentFoucs].setFocus()
 
@@ -1475,6 +1709,34 @@ class MainWindow(QMainWindow):
         self.mainWidget = QWidget()
         self.leftWidget = LeftWidget()
         self.rightWidget = RightWidget()
+        self.boardLocator = BoardLocator(self.leftWidget.chessWebView)
+        self.positionReader = PositionReader(self.leftWidget.chessWebView)
+        self.positionReconciler = PositionReconciler(self.leftWidget.chessWebView)
+        ## the last missed move that failed validation, told once rather than on every poll
+        self.unreplayed_move = None
+        self.moveChannel = MoveChannel(self.leftWidget.chessWebView.page())
+        self.moveChannel.bridge.moveAdded.connect(self.on_move_pushed)
+        self.moveChannel.bridge.channelReady.connect(self.on_move_channel_ready)
+        self.webAutomation = WebAutomation(
+            self.leftWidget.chessWebView.page(), self.moveChannel.bridge
+        )
+        self.pageMoveExecutor = PageEventMoveExecutor(
+            self.leftWidget.chessWebView.page(), self.leftWidget.chessWebView
+        )
+        self.cursorMoveExecutor = MoveExecutor(self.leftWidget.chessWebView.page())
+        for executor in (self.pageMoveExecutor, self.cursorMoveExecutor):
+            executor.moveFinished.connect(self.on_move_executed)
+        self.select_move_executor()
+        self.moveVerifier = MoveVerifier(self.leftWidget.chessWebView.page())
+        self.pending_move = None
+        self.premoves = []
+        self.profile = PROFILES[Time_control.classical]
+        self.latencyBudget = LatencyBudget(self.profile.latency_budget)
+        ## the profile picks the verbosity until the user chooses one
+        self.verbosity = Verbosity.full
+        self.verbosity_chosen = False
+        self.leftWidget.chessWebView.loadStarted.connect(self.on_page_load_started)
+        self.move_channel_ready = False
 
         def timeCallback(clocks):
             if not clocks == None:
@@ -1485,7 +1747,10 @@ class MainWindow(QMainWindow):
                 opponent = (
                     opponent_time[0] + " minutes " + opponent_time[1] + " seconds"
                 )
-                speak(Speak_template.check_time_sentense.value.format(user, opponent))
+                speak(
+                    Speak_template.check_time_sentense.value.format(user, opponent),
+                    category=Speech_category.query,
+                )
 
         self.rightWidget.check_time.clicked.connect(
             partial(self.leftWidget.checkTime, timeCallback)
@@ -1496,6 +1761,12 @@ class MainWindow(QMainWindow):
         self.rightWidget.playWithOtherButton.clicked.connect(
             self.playWithOtherButtonHandler
         )
+        self.rightWidget.playBlitzButton.clicked.connect(
+            partial(self.playWithOtherButtonHandler, timeControl=Time_control.blitz)
+        )
+        self.rightWidget.playBulletButton.clicked.connect(
+            partial(self.playWithOtherButtonHandler, timeControl=Time_control.bullet)
+        )
 
         self.rightWidget.resign.clicked.connect(self.resign_handler)
 
@@ -1508,14 +1779,29 @@ class MainWindow(QMainWindow):
 
         self.leftWidget.setFocusPolicy(Qt.FocusPolicy.NoFocus)
 
-        self.getScoreTimer = QTimer()
-        self.getScoreTimer.timeout.connect(self.check_score)
-
-        self.getOpponentMoveTimer = QTimer()
-        self.getOpponentMoveTimer.timeout.connect(self.getOpponentMove)
-
-        self.check_game_end_timer = QTimer()
-        self.check_game_end_timer.timeout.connect(self.check_game_end)
+        ## every page query goes through one scheduler, batched into one JS call per tick
+        self.pollScheduler = PollScheduler(self.leftWidget.chessWebView.page())
+        self.pollScheduler.register(
+            "moves", "movesAfter", self.on_moves_polled, args=self.synced_ply
+        )
+        self.pollScheduler.register(
+            "position", "fingerprint", self.reconcile_position, period=3000
+        )
+        self.pollScheduler.register(
+            "score", "checkScore", self.on_score_polled, period=1000
+        )
+        ## the clock runs while the user types, so it is not paused with the scheduler
+        self.clockTimer = QTimer()
+        self.clockTimer.setInterval(1000)
+        self.clockTimer.timeout.connect(
+            partial(self.leftWidget.checkTime, self.on_clock_polled)
+        )
+        self.low_time_warned = False
+        ## cues are decoded once here, before any game starts
+        self.earconPlayer = EarconPlayer(
+            os.path.join(current_dir, "Resources", "Sound")
+        )
+        self.rightWidget.commandPanel.textChanged.connect(self.on_command_text_changed)
 
         mainLayout = QHBoxLayout()
         mainLayout.addWidget(self.leftWidget)
@@ -1533,13 +1819,13 @@ class MainWindow(QMainWindow):
         # self.show_information_box()
 
 
-def speak(sentence, importance=False, dialog=False):
+def speak(sentence, importance=False, dialog=False, category=Speech_category.general):
     global previous_sentence
     global internal_speak_engine
 
     previous_sentence = sentence
     if internal_speak_engine:
-        speak_thread.queue.put((sentence, importance))
+        speak_thread.say(sentence, importance, category)
     else:
         print("no speak engine")
 
@@ -1550,13 +1836,31 @@ if __name__ == "__main__":
     global previous_sentence
     previous_sentence = ""
 
-    speak_thread = TTSThread()
+    ## CHESSBOT_SPEECH=null or recording runs without a speech driver
+    speech_setting = os.environ.get("CHESSBOT_SPEECH", "PYTTSX3").upper()
+    try:
+        speech_backend = Speech_backend(speech_setting)
+    except ValueError:
+        print("unknown CHESSBOT_SPEECH", speech_setting, "falling back to pyttsx3")
+        speech_backend = Speech_backend.pyttsx3
+    speak_thread = TTSThread(createBackend(speech_backend))
     # speak_thread.start()
     current_dir = os.path.dirname(os.path.realpath(__file__))
 
     app = QApplication(sys.argv)
     app.setApplicationName("Chess Bot")
 
+    ## fixed sentences rendered once in the background and played from memory
+    fixed_phrases = [file + rank for file in "ABCDEFGH" for rank in "12345678"] + [
+        "Cancel",
+        "Cancel!",
+    ]
+    for template in Speak_template:
+        if not template.value.count("{"):
+            fixed_phrases.append(template.value)
+    speak_thread.attach_cache(PhraseCache(fixed_phrases), ClipPlayer())
+    speak_thread.warm(fixed_phrases)
+
     window = MainWindow()
 
     global internal_speak_engine
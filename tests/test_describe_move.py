@@ -0,0 +1,31 @@
+import chess
+import pytest
+
+from Components.chess_validation_component import describeMove
+from Utils.enum_helper import Verbosity
+
+## fool's mate, black to play Qh4#
+FOOLS_MATE = "rnbqkbnr/pppp1ppp/8/4p3/6P1/5P2/PPPPP2P/RNBQKBNR b KQkq - 0 2"
+
+
+@pytest.mark.parametrize(
+    "verbosity, sentence",
+    [
+        (Verbosity.full, "BLACK queen moves to h4 and checkmate "),
+        (Verbosity.brief, "queen h4 mate"),
+        (Verbosity.terse, "Qh4 mate"),
+    ],
+)
+def test_mate_wording(verbosity, sentence):
+    board = chess.Board(FOOLS_MATE)
+    assert describeMove(board, chess.Move.from_uci("d8h4"), verbosity) == sentence
+    assert board.fen() == FOOLS_MATE
+
+
+def test_check_is_not_announced_as_mate():
+    board = chess.Board("4k3/8/8/8/8/8/8/R3K3 w - - 0 1")
+    move = chess.Move.from_uci("a1a8")
+    assert (
+        describeMove(board, move, Verbosity.full) == "WHITE rook moves to a8 and check "
+    )
+    assert describeMove(board, move, Verbosity.terse) == "Ra8 check"
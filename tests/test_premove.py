@@ -0,0 +1,85 @@
+import pytest
+
+## main needs the web engine, skipped where it can not load
+main = pytest.importorskip("main", exc_type=ImportError)
+
+from Components.chess_validation_component import ChessBoard
+from Components.game_profile_component import LatencyBudget
+from Utils.enum_helper import Game_flow_status, Verbosity
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, targetWidget, destWidget, promoteWidget=None):
+        self.executed.append((targetWidget, destWidget, promoteWidget))
+        return True
+
+
+class FakeEarcons:
+    def play(self, earcon):
+        pass
+
+
+class FakeLeftWidget:
+    def __init__(self):
+        ## keyed like getBoard does, e.g. "E2"
+        self.grids = {
+            file + rank: file + rank for file in "ABCDEFGH" for rank in "12345678"
+        }
+
+
+## the MainWindow methods a premove goes through, without building the window
+class PremoveWindow:
+    play_premove = main.MainWindow.play_premove
+    execute_user_move = main.MainWindow.execute_user_move
+    inject_user_move = main.MainWindow.inject_user_move
+    describe_move = main.MainWindow.describe_move
+    promote_square = main.MainWindow.promote_square
+
+    def __init__(self, premoves, userColor="WHITE"):
+        self.premoves = list(premoves)
+        self.chessBoard = ChessBoard()
+        self.userColor = userColor
+        self.game_flow_status = Game_flow_status.user_turn
+        self.latencyBudget = LatencyBudget(3000)
+        self.verbosity = Verbosity.full
+        self.earconPlayer = FakeEarcons()
+        self.leftWidget = FakeLeftWidget()
+        self.moveExecutor = FakeExecutor()
+
+    def all_grids_switch(self, on):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def silent_speak(monkeypatch):
+    spoken = []
+    monkeypatch.setattr(
+        main, "speak", lambda sentence, *args, **kwargs: spoken.append(sentence)
+    )
+    return spoken
+
+
+def test_premove_reaches_the_executor_with_grid_squares():
+    window = PremoveWindow(["e4"])
+    assert window.play_premove()
+    assert window.moveExecutor.executed == [("E2", "E4", None)]
+    assert window.pending_move["squares"] == ("E2", "E4", None)
+    assert window.game_flow_status == Game_flow_status.opponent_turn
+
+
+def test_premove_promotion_clicks_the_picker_square():
+    window = PremoveWindow(["a8=q"])
+    window.chessBoard.board_object.set_fen("7k/P7/8/8/8/8/8/K7 w - - 0 1")
+    assert window.play_premove()
+    assert window.moveExecutor.executed == [("A7", "A8", "A8")]
+
+
+def test_illegal_premove_clears_the_queue(silent_speak):
+    window = PremoveWindow(["e5", "d4"])
+    assert not window.play_premove()
+    assert window.premoves == []
+    assert window.moveExecutor.executed == []
+    assert "premoves cleared" in silent_speak[-1]